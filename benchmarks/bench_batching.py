@@ -0,0 +1,49 @@
+# Vazão com e sem micro-batching quando o provedor limita as requisições
+# simultâneas (--concurrency). Parte dos prompts é repetida para exercitar o
+# single-flight.
+#
+#   python -m benchmarks.bench_batching --requests 400 --concurrency 4 --batch-size 16
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from benchmarks.fake_llm_server import FakeLLMServer
+from src.utils.ai_integration import LLMClient
+
+
+async def run(server: FakeLLMServer, args, batch_size: int) -> float:
+    client = LLMClient(api_base=server.url, api_key="fake", max_concurrency=args.concurrency,
+                       batch_max_size=batch_size, batch_max_wait=args.batch_wait)
+    prompts = [f"prompt {i % args.unique}" for i in range(args.requests)]
+    server.requests = 0
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(client.complete(prompt) for prompt in prompts))
+        return time.perf_counter() - start
+    finally:
+        await client.close()
+
+
+async def main(args):
+    async with FakeLLMServer(latency=args.latency, jitter=args.jitter) as server:
+        for batch_size in (1, args.batch_size):
+            elapsed = await run(server, args, batch_size)
+            label = "sem lote" if batch_size == 1 else f"lote {batch_size}"
+            print(f"{label:<9} {args.requests} chamadas em {elapsed:.2f}s ({args.requests / elapsed:.1f}/s), "
+                  f"{server.requests} requisições ao provedor, maior lote {server.max_batch}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--unique", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--batch-wait", type=float, default=0.01)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    asyncio.run(main(parser.parse_args()))
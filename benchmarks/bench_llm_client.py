@@ -0,0 +1,52 @@
+# Compara chamadas sequenciais (shim síncrono) com chamadas concorrentes
+# (aget_ai_response) contra o servidor LLM falso.
+#
+#   python -m benchmarks.bench_llm_client --requests 200 --latency 0.2
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from benchmarks.fake_llm_server import FakeLLMServer
+from src.utils.ai_integration import LLMClient
+
+
+async def run_concurrent(client: LLMClient, n: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(client.complete(f"prompt {i}") for i in range(n)))
+    return time.perf_counter() - start
+
+
+async def run_sequential(client: LLMClient, n: int) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        await client.complete(f"prompt {i}")
+    return time.perf_counter() - start
+
+
+async def main(args):
+    async with FakeLLMServer(latency=args.latency, jitter=args.jitter) as server:
+        client = LLMClient(api_base=server.url, api_key="fake", max_concurrency=args.concurrency)
+        try:
+            sequential_n = min(args.requests, args.sequential_requests)
+            elapsed = await run_sequential(client, sequential_n)
+            print(f"sequencial:  {sequential_n} req em {elapsed:.2f}s ({sequential_n / elapsed:.1f} req/s)")
+
+            elapsed = await run_concurrent(client, args.requests)
+            print(f"concorrente: {args.requests} req em {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s, "
+                  f"pico de {server.max_in_flight} em voo)")
+        finally:
+            await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--sequential-requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
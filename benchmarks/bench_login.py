@@ -0,0 +1,89 @@
+# Tempestade de logins contra POST /token, medindo ao mesmo tempo a latência
+# de uma rota leve (GET /metrics) para ver se o event loop continua livre.
+#
+#   python -m benchmarks.bench_login --logins 100 --concurrency 50
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_login.db")
+
+import aiohttp
+import uvicorn
+from src.utils.database import SessionLocal, DBUser
+from src.utils.password_hashing import pwd_context
+from src.interfaces.web_interface import app
+
+
+def create_user(username: str, password: str):
+    with SessionLocal() as db:
+        if db.query(DBUser).filter(DBUser.username == username).first() is None:
+            db.add(DBUser(username=username, email=f"{username}@example.com",
+                          hashed_password=pwd_context.hash(password)))
+            db.commit()
+
+
+async def login(session, url, semaphore):
+    async with semaphore:
+        start = time.perf_counter()
+        async with session.post(f"{url}/token", data={"username": "bench", "password": "bench"}) as response:
+            await response.read()
+            return response.status, time.perf_counter() - start
+
+
+async def probe(session, url, stop, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        async with session.get(f"{url}/metrics") as response:
+            await response.read()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.02)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+async def main(args):
+    create_user("bench", "bench")
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    url = f"http://127.0.0.1:{args.port}"
+    probe_latencies = []
+    stop = asyncio.Event()
+    try:
+        async with aiohttp.ClientSession() as session:
+            probe_task = asyncio.create_task(probe(session, url, stop, probe_latencies))
+            semaphore = asyncio.Semaphore(args.concurrency)
+            start = time.perf_counter()
+            results = await asyncio.gather(*(login(session, url, semaphore) for _ in range(args.logins)))
+            elapsed = time.perf_counter() - start
+            stop.set()
+            await probe_task
+    finally:
+        server.should_exit = True
+        await server_task
+
+    latencies = [latency for status, latency in results if status == 200]
+    print(f"{args.logins} logins em {elapsed:.2f}s ({args.logins / elapsed:.1f}/s), "
+          f"{len(latencies)} ok, {sum(1 for status, _ in results if status == 503)} recusados (503)")
+    if latencies:
+        print(f"login p50 {statistics.median(latencies) * 1000:.0f} ms, p99 {percentile(latencies, 0.99) * 1000:.0f} ms")
+    print(f"GET /metrics durante a tempestade: p50 {statistics.median(probe_latencies) * 1000:.1f} ms, "
+          f"p99 {percentile(probe_latencies, 0.99) * 1000:.1f} ms, máx {max(probe_latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,56 @@
+# Latência ponta a ponta do Researcher nos modos sequential, pipelined e fanout
+# contra o servidor LLM falso. A pesquisa gera `--completion-tokens` tokens; o
+# resumo gera um quarto do tamanho do texto resumido.
+#
+#   python -m benchmarks.bench_pipeline --completion-tokens 300 --token-latency 0.01
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("LLM_CACHE_ENABLED", "0")
+
+from benchmarks.fake_llm_server import FakeLLMServer
+from src.agents.agent_researcher import AgentResearcher, RESEARCH_ASPECTS
+from src.agents import pipeline
+from src.utils import ai_integration
+
+
+class ChainedLLMServer(FakeLLMServer):
+    def _content(self, payload, prompt):
+        if prompt.startswith("Summarize"):
+            n = max(10, len(prompt.split()) // 4)
+            return " ".join(f"resumo{i}" for i in range(n))
+        return super()._content(payload, prompt)
+
+
+async def main(args):
+    async with ChainedLLMServer(latency=args.latency, token_latency=args.token_latency,
+                                completion_tokens=args.completion_tokens) as server:
+        client = ai_integration.LLMClient(api_base=server.url, api_key="fake")
+        ai_integration._clients[asyncio.get_running_loop()] = client
+        # Cada aspecto do modo fanout cobre uma fração da pesquisa completa
+        pipeline.PIPELINE_FANOUT_MAX_TOKENS = args.completion_tokens // len(RESEARCH_ASPECTS)
+        try:
+            for mode in pipeline.PIPELINE_MODES:
+                agent = AgentResearcher(mode=mode)
+                elapsed = []
+                for i in range(args.runs):
+                    start = time.perf_counter()
+                    await agent.aprocess(f"{mode} {i}")
+                    elapsed.append(time.perf_counter() - start)
+                print(f"{mode:<11} média {sum(elapsed) / len(elapsed):.2f}s "
+                      f"(min {min(elapsed):.2f}s, max {max(elapsed):.2f}s)")
+        finally:
+            await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--completion-tokens", type=int, default=300)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,54 @@
+# Rajada de chamadas contra um provedor com cota de concorrência (429 acima de
+# --quota simultâneas): limite fixo vs. concorrência adaptativa (AIMD), e o
+# efeito do balde de requisições por minuto (--rpm).
+#
+#   python -m benchmarks.bench_rate_limit --requests 300 --quota 8
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("LLM_CACHE_ENABLED", "0")
+
+from benchmarks.fake_llm_server import FakeLLMServer
+from src.utils.ai_integration import LLMClient
+from src.utils.rate_limit import RateLimiter
+
+
+async def run(server: FakeLLMServer, args, label: str, min_concurrency: int, rpm: float = 0):
+    client = LLMClient(api_base=server.url, api_key="fake", max_concurrency=args.concurrency,
+                       min_concurrency=min_concurrency, rate_limiter=RateLimiter(rpm=rpm, tpm=0, shared=False),
+                       max_retries=args.retries, backoff=0.2)
+    server.requests = server.throttled = 0
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(client.complete(f"{label} {i}") for i in range(args.requests)),
+                                       return_exceptions=True)
+        elapsed = time.perf_counter() - start
+    finally:
+        await client.close()
+    failed = sum(isinstance(result, Exception) for result in results)
+    print(f"{label:<14} {elapsed:6.2f}s  {(args.requests - failed) / elapsed:6.1f} ok/s  "
+          f"{server.throttled:4d} x 429  {failed} falhas  limite final {client._concurrency.limit:.1f}")
+
+
+async def main(args):
+    async with FakeLLMServer(latency=args.latency, jitter=args.jitter, max_concurrency=args.quota) as server:
+        await run(server, args, "fixo", min_concurrency=args.concurrency)
+        await run(server, args, "aimd", min_concurrency=1)
+        if args.rpm:
+            await run(server, args, f"aimd+{args.rpm:g}rpm", min_concurrency=1, rpm=args.rpm)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--quota", type=int, default=8)
+    parser.add_argument("--rpm", type=float, default=0)
+    parser.add_argument("--retries", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    asyncio.run(main(parser.parse_args()))
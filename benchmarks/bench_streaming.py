@@ -0,0 +1,48 @@
+# Tempo até o primeiro byte: Researcher.aprocess (duas chamadas encadeadas,
+# resposta inteira no fim) contra Researcher.astream (tokens conforme chegam).
+#
+#   python -m benchmarks.bench_streaming --latency 0.5 --token-latency 0.02
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("LLM_CACHE_ENABLED", "0")
+
+from benchmarks.fake_llm_server import FakeLLMServer
+from src.agents.agent_researcher import AgentResearcher
+from src.utils import ai_integration
+
+
+async def main(args):
+    async with FakeLLMServer(latency=args.latency, token_latency=args.token_latency) as server:
+        client = ai_integration.LLMClient(api_base=server.url, api_key="fake")
+        ai_integration._clients[asyncio.get_running_loop()] = client
+        agent = AgentResearcher()
+        try:
+            for i in range(args.runs):
+                query = f"tarefa {i}"
+                start = time.perf_counter()
+                await agent.aprocess(query)
+                blocking = time.perf_counter() - start
+
+                start = time.perf_counter()
+                first_token = None
+                async for _ in agent.astream(query + " (stream)"):
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                total = time.perf_counter() - start
+                print(f"aprocess: primeiro byte em {blocking:.3f}s | astream: primeiro token em "
+                      f"{first_token:.3f}s, completo em {total:.3f}s")
+        finally:
+            await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,194 @@
+# Servidor LLM falso (API compatível com OpenAI) para benchmarks offline.
+#
+#   python -m benchmarks.fake_llm_server --port 8089 --latency 0.3
+#
+# Ou dentro de um script:
+#
+#   async with FakeLLMServer(latency=0.2) as server:
+#       client = LLMClient(api_base=server.url, api_key="fake")
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from aiohttp import web
+
+
+class FakeLLMServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.1,
+                 jitter: float = 0.0, error_rate: float = 0.0, token_latency: float = 0.0,
+                 completion_tokens: int = 0, supports_batch: bool = True, max_concurrency: int = 0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.token_latency = token_latency
+        self.completion_tokens = completion_tokens
+        self.supports_batch = supports_batch
+        # Cota de requisições simultâneas: acima dela responde 429 na hora (0 = sem cota)
+        self.max_concurrency = max_concurrency
+        self.throttled = 0
+        self.max_batch = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._runner = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def _over_quota(self) -> bool:
+        if self.max_concurrency and self.in_flight > self.max_concurrency:
+            self.throttled += 1
+            return True
+        return False
+
+    async def _delay(self):
+        await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+    def _content(self, payload: dict, prompt: str) -> str:
+        # Por padrão ecoa o prompt; com `completion_tokens`, gera um texto desse
+        # tamanho (respeitando max_tokens) em parágrafos de 40 palavras
+        if not self.completion_tokens:
+            return f"Resposta falsa para: {prompt}"
+        n = min(self.completion_tokens, payload.get("max_tokens") or self.completion_tokens)
+        words = [f"palavra{i}" for i in range(n)]
+        paragraphs = [" ".join(words[i:i + 40]) for i in range(0, n, 40)]
+        return "\n\n".join(paragraphs)
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self._over_quota():
+                return web.json_response({"error": {"message": "too many concurrent requests"}}, status=429)
+            await self._delay()
+            if self.error_rate and random.random() < self.error_rate:
+                return web.json_response({"error": {"message": "rate limited"}}, status=429)
+            prompt = payload["messages"][-1]["content"]
+            content = self._content(payload, prompt)
+            if payload.get("stream"):
+                return await self._stream(request, payload, content)
+            # Sem streaming a resposta só sai depois de gerado o último token
+            await asyncio.sleep(self.token_latency * (len(content.split(" ")) - 1))
+            return web.json_response({
+                "id": f"fake-{self.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(content.split()),
+                          "total_tokens": len(prompt.split()) + len(content.split())},
+            })
+        finally:
+            self.in_flight -= 1
+
+    async def completions(self, request: web.Request) -> web.Response:
+        # Endpoint legado de completions: aceita uma lista de prompts numa só chamada
+        payload = await request.json()
+        prompts = payload["prompt"] if isinstance(payload["prompt"], list) else [payload["prompt"]]
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.max_batch = max(self.max_batch, len(prompts))
+        try:
+            if self._over_quota():
+                return web.json_response({"error": {"message": "too many concurrent requests"}}, status=429)
+            await self._delay()
+            if self.error_rate and random.random() < self.error_rate:
+                return web.json_response({"error": {"message": "rate limited"}}, status=429)
+            contents = [self._content(payload, prompt) for prompt in prompts]
+            await asyncio.sleep(self.token_latency * (max(len(content.split(" ")) for content in contents) - 1))
+            return web.json_response({
+                "id": f"fake-{self.requests}",
+                "object": "text_completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "fake"),
+                "choices": [{"index": i, "text": content, "finish_reason": "stop"}
+                            for i, content in enumerate(contents)],
+            })
+        finally:
+            self.in_flight -= 1
+
+    async def _stream(self, request: web.Request, payload: dict, content: str) -> web.StreamResponse:
+        # `latency` vira o tempo até o primeiro token; cada token seguinte leva `token_latency`
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for i, token in enumerate(content.split(" ")):
+            if i:
+                await asyncio.sleep(self.token_latency)
+            chunk = {
+                "id": f"fake-{self.requests}",
+                "object": "chat.completion.chunk",
+                "model": payload.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {"content": token if i == 0 else " " + token},
+                             "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        if self.supports_batch:
+            app.router.add_post("/v1/completions", self.completions)
+        return app
+
+    async def start(self):
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Porta 0: descobrir a porta efetivamente atribuída
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+
+async def _serve(args):
+    server = FakeLLMServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.token_latency,
+                           args.completion_tokens, max_concurrency=args.max_concurrency)
+    await server.start()
+    print(f"Fake LLM server em {server.url} (latência {args.latency}s)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-latency", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int, default=0)
+    parser.add_argument("--max-concurrency", type=int, default=0)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
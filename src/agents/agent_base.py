@@ -1,19 +1,66 @@
+import asyncio
 from abc import ABC, abstractmethod
+from src.agents.pipeline import AGENT_PIPELINE_MODE, PIPELINE_MODES
+from src.agents.agent_memory import AgentMemory, AGENT_MEMORY_SQL
+from src.agents.process_pool import run_in_process
 
 class AgentBase(ABC):
-    def __init__(self, name):
+    # Com True, aprocess roda process() num pool de processos (ver
+    # src/agents/process_pool.py), numa instância aquecida do processo filho:
+    # process() deve depender só da entrada e do estado criado em warm_up()
+    cpu_bound = False
+
+    def __init__(self, name, mode=None, memory=None):
         self.name = name
-        self.memory = {}
+        # Memória limitada (LRU por entradas/bytes); ver src/agents/agent_memory.py
+        self.memory = memory if memory is not None else AgentMemory()
+        self.project_id = None
+        # Como aprocess encadeia as etapas (ver src/agents/pipeline.py)
+        self.mode = mode or AGENT_PIPELINE_MODE
+        if self.mode not in PIPELINE_MODES:
+            raise ValueError(f"Modo de pipeline desconhecido: {self.mode}")
 
     @abstractmethod
     def process(self, input_data):
         pass
 
+    def warm_up(self):
+        # Estado caro de preparar (ex.: esquemas compilados), criado uma vez por processo
+        pass
+
+    async def aprocess(self, input_data):
+        if self.cpu_bound:
+            return await run_in_process(type(self), input_data)
+        # Agentes sem implementação assíncrona rodam em thread para não bloquear o loop
+        return await asyncio.to_thread(self.process, input_data)
+
+    async def astream(self, input_data):
+        # Gera pares (etapa, texto) conforme a saída fica disponível. Agentes sem
+        # streaming entregam o resultado inteiro de uma vez.
+        yield "output", await self.aprocess(input_data)
+
+    def bind_project(self, project_id):
+        # Instâncias do pool atendem vários projetos: a memória de um não vaza para
+        # o outro. Com AGENT_MEMORY_SQL, passa a ser a do projeto no banco.
+        if project_id == self.project_id:
+            return
+        self.project_id = project_id
+        store = None
+        if AGENT_MEMORY_SQL and project_id is not None:
+            # Importado só aqui: os filhos do pool de processos não ligam agentes a projetos
+            # e não devem criar engines nem rodar create_all ao importar src.utils.database
+            from src.agents.agent_memory_sql import SQLMemoryStore
+            store = SQLMemoryStore(self.name, project_id)
+        self.memory = self.memory.with_store(store)
+
     def update_memory(self, key, value):
-        self.memory[key] = value
+        self.memory.set(key, value)
+
+    async def aupdate_memory(self, key, value):
+        await self.memory.aset(key, value)
 
     def get_memory(self, key):
         return self.memory.get(key)
 
     def clear_memory(self):
-        self.memory.clear()
\ No newline at end of file
+        self.memory.clear()
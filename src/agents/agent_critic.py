@@ -1,9 +1,13 @@
 from src.agents.agent_base import AgentBase
-from src.utils.ai_integration import get_ai_response
+from src.utils.ai_integration import get_ai_response, aget_ai_response, aget_ai_response_stream
+from src.agents.pipeline import pipelined, fan_out
+
+# Critérios analisados em paralelo no modo fanout
+CRITIC_CRITERIA = ("correctness and completeness", "risks and failure modes", "feasibility and cost")
 
 class AgentCritic(AgentBase):
-    def __init__(self):
-        super().__init__("Critic")
+    def __init__(self, mode=None, memory=None):
+        super().__init__("Critic", mode, memory)
 
     def process(self, solution):
         # Analyze the proposed solution
@@ -11,12 +15,48 @@ class AgentCritic(AgentBase):
         feedback = self.generate_feedback(analysis)
         return feedback
 
+    async def aprocess(self, solution):
+        if self.mode == "pipelined":
+            _, feedback = await pipelined(f"Analyze this solution critically: {solution}",
+                                          lambda analysis: f"Based on this analysis, provide constructive feedback: {analysis}")
+            return feedback
+        if self.mode == "fanout":
+            analysis = await self.aanalyze_solution_fanout(solution)
+        else:
+            analysis = await self.aanalyze_solution(solution)
+        feedback = await self.agenerate_feedback(analysis)
+        return feedback
+
+    async def astream(self, solution):
+        parts = []
+        async for token in aget_ai_response_stream(f"Analyze this solution critically: {solution}"):
+            parts.append(token)
+            yield "analysis", token
+        analysis = "".join(parts)
+        async for token in aget_ai_response_stream(f"Based on this analysis, provide constructive feedback: {analysis}"):
+            yield "feedback", token
+
     def analyze_solution(self, solution):
         prompt = f"Analyze this solution critically: {solution}"
         analysis = get_ai_response(prompt)
         return analysis
 
+    async def aanalyze_solution(self, solution):
+        prompt = f"Analyze this solution critically: {solution}"
+        analysis = await aget_ai_response(prompt)
+        return analysis
+
+    async def aanalyze_solution_fanout(self, solution):
+        analyses = await fan_out([f"Analyze this solution critically: {solution}\n\nFocus only on: {criterion}"
+                                  for criterion in CRITIC_CRITERIA])
+        return "\n\n".join(f"## {criterion}\n{analysis}" for criterion, analysis in zip(CRITIC_CRITERIA, analyses))
+
     def generate_feedback(self, analysis):
         prompt = f"Based on this analysis, provide constructive feedback: {analysis}"
         feedback = get_ai_response(prompt)
-        return feedback
\ No newline at end of file
+        return feedback
+
+    async def agenerate_feedback(self, analysis):
+        prompt = f"Based on this analysis, provide constructive feedback: {analysis}"
+        feedback = await aget_ai_response(prompt)
+        return feedback
@@ -1,72 +1,265 @@
-import json
-from src.utils.database import get_db, DBProject
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from datetime import datetime
+from src.utils.database import SessionLocal, DBProject
+from src.utils.ai_integration import run_sync
+from src.utils import checklist_store, task_queue
+from src.utils.artifact_store import artifact_store
+from src.utils.events import event_bus, project_topic
+from src.agents.agent_pool import agent_pool
+from src.agents.agent_validator import AgentValidator
+from src.agents.task_graph import TaskGraph, run_graph
+
+logger = logging.getLogger(__name__)
+
+AGENT_MAX_CONCURRENCY = int(os.getenv("AGENT_MAX_CONCURRENCY", "8"))
+# local: as fases rodam neste processo; distributed: as tarefas vão para a fila
+# do banco e são executadas pelos runners (src/runner.py)
+AGENT_EXECUTION = os.getenv("AGENT_EXECUTION", "local")
+
+# Tarefas de revisão/validação vão para o Crítico, as demais para o Pesquisador.
+# Casa no início da palavra ("entrevistas" não é revisão).
+CRITIC_KEYWORDS = re.compile(r"\b(revis|valid|analis|análise|teste|monitor)", re.IGNORECASE)
+
+def select_agent(tarefa):
+    return "Crítico" if CRITIC_KEYWORDS.search(tarefa) else "Pesquisador"
+
+# Campos do projeto que entram na entrada de cada tarefa: a descrição vale para
+# todas, o prazo só para as de planejamento e o feedback de uma fase só para as
+# tarefas dela. Mudar um campo refaz só as tarefas que o leem (e as que
+# dependem delas, pelo contexto).
+DEADLINE_KEYWORDS = re.compile(r"\b(cronograma|prazo|planej|recurso)", re.IGNORECASE)
+
+def load_project_inputs(db, project_id):
+    project = db.get(DBProject, project_id)
+    if project is None:
+        return {}
+    return {"description": project.description,
+            "deadline": project.deadline.isoformat() if project.deadline else None,
+            "feedback": checklist_store.load_feedback(db, project_id)}
+
+def task_project_inputs(phase, tarefa, inputs):
+    selected = {}
+    if inputs.get("description"):
+        selected["Descrição do projeto"] = inputs["description"]
+    if inputs.get("deadline") and DEADLINE_KEYWORDS.search(tarefa):
+        selected["Prazo"] = inputs["deadline"]
+    feedback = inputs.get("feedback", {}).get(phase)
+    if feedback:
+        selected["Feedback"] = feedback
+    return selected
+
+def task_input(tarefa, context, project=None):
+    # Campos do projeto e saídas das tarefas das quais esta depende entram como contexto
+    parts = [tarefa]
+    if project:
+        parts.append("Projeto:\n" + "\n".join(f"{name}: {value}" for name, value in project.items()))
+    if context:
+        parts.append("Contexto:\n" + "\n".join(context))
+    return "\n\n".join(parts)
+
+def input_hash(agent_type, input_data):
+    return hashlib.sha256(f"{agent_type}\n{input_data}".encode("utf-8")).hexdigest()
+
+async def in_session(fn, *args, **kwargs):
+    # Banco síncrono numa thread, com sessão própria por chamada: as corrotinas
+    # rodam no loop da API ou no loop compartilhado dos agentes, que não podem travar
+    def call():
+        with SessionLocal() as db:
+            return fn(db, *args, **kwargs)
+    return await asyncio.to_thread(call)
+
+def load_run_state(db, project_id, phases, resume):
+    checklist_store.create_checklist(db, project_id)
+    checklist, task_ids = checklist_store.load_checklist(db, project_id)
+    outputs = checklist_store.load_outputs(db, project_id, phases) if resume else {}
+    return checklist, task_ids, load_project_inputs(db, project_id), outputs
+
+def record_feedback(db, project_id, feedback):
+    # O feedback é sobre a fase atual: vira entrada das tarefas dela e libera a próxima
+    project = db.get(DBProject, project_id)
+    phase = project.current_phase or 1
+    checklist_store.set_phase_feedback(db, project_id, phase, feedback, commit=False)
+    project.current_phase = phase + 1
+    db.commit()
+
+def current_phase(db, project_id):
+    project = db.get(DBProject, project_id)
+    return project.current_phase if project is not None else None
 
 class AgentManager:
-    def __init__(self):
+    def __init__(self, project_id=None, max_concurrency=AGENT_MAX_CONCURRENCY):
+        self.project_id = project_id
         self.current_phase = 1
-        self.agents = []
+        self.agents = {}
+        self.max_concurrency = max_concurrency
+        self.results = {}
+        self.timings = {}
+        self.graph = TaskGraph()
+        self.metrics = {}
+        self.task_ids = {}
+        self.project_inputs = {}
+        self.outputs = {}
+        self.reused = 0
+
+    def process_project(self, project_id, projeto=None):
+        self.project_id = project_id
 
-    def process_project(self, project_id):
-        # Ler projeto.json
-        with open('src/data/projeto.json', 'r') as f:
-            projeto = json.load(f)
+        # Ler o projeto.json do projeto (em memória se veio do mesmo processo)
+        if projeto is None:
+            projeto = artifact_store.get(project_id, "projeto")
+        if projeto is None:
+            raise ValueError(f"projeto.json do projeto {project_id} não encontrado")
 
-        # Preencher checklist.json
+        # Validar a estrutura do projeto.json (no pool de processos) antes de seguir
+        validacao = run_sync(AgentValidator().aprocess(projeto))
+        # Só em memória: ninguém lê a validação de outro processo
+        artifact_store.put(project_id, "validacao", validacao, persist=False)
+        if not validacao["valid"]:
+            logger.warning(f"projeto.json do projeto {project_id} com pendências (nota {validacao['score']:.2f}): "
+                           f"{'; '.join(validacao['errors'])}")
+
+        # Preencher o checklist do projeto
         self.fill_checklist(projeto)
 
         # Iniciar Fase 1
         self.start_phase(1)
 
     def fill_checklist(self, projeto):
-        # Ler o arquivo checklist.json existente
-        with open('src/data/checklist.json', 'r') as f:
-            checklist = json.load(f)
-
-        # Atualizar o checklist com informações do projeto
-        checklist["Fase 1: Iniciação e Planejamento"]["Tarefas"].extend([
-            f"Revisar escopo do projeto: {projeto['escopo_do_projeto']}",
-            f"Analisar riscos potenciais: {projeto['riscos_potenciais']}",
-            f"Definir cronograma baseado no prazo estimado de {projeto['prazo_estimado']}"
-        ])
-
-        # Salvar o checklist atualizado
-        with open('src/data/checklist.json', 'w') as f:
-            json.dump(checklist, f, indent=2)
-
-    def start_phase(self, phase):
-        print(f"Iniciando Fase {phase}")
+        # Atualizar o checklist do projeto com informações do projeto.json
+        with SessionLocal() as db:
+            checklist_store.create_checklist(db, self.project_id)
+            checklist_store.add_tasks(db, self.project_id, 1, [
+                f"Revisar escopo do projeto: {projeto['Escopo do Projeto']}",
+                f"Analisar riscos potenciais: {projeto['Riscos Potenciais']}",
+                f"Definir cronograma baseado no prazo estimado de {projeto['Prazo Estimado']}"
+            ])
+
+    def start_phase(self, phase, resume=True):
+        return run_sync(self.astart_phase(phase, resume))
+
+    async def astart_phase(self, phase, resume=True):
+        # resume: tarefas com saída gravada para a mesma entrada (fase interrompida
+        # por um deploy, por exemplo) não rodam de novo; resume=False refaz a fase inteira
+        logger.info(f"Iniciando Fase {phase}")
         self.generate_agents()
-        self.work_on_phase(phase)
+        return await self.awork_on_phase(phase, resume)
 
     def generate_agents(self):
-        self.agents = ["Agente Planejador", "Agente Analista de Riscos", "Agente de Cronograma"]
-        print(f"Agentes gerados para a fase atual: {self.agents}")
-
-    def work_on_phase(self, phase):
-        print(f"Agentes trabalhando na Fase {phase}")
-        # Simular trabalho dos agentes
-        with open('src/data/checklist.json', 'r') as f:
-            checklist = json.load(f)
-        
-        fase_atual = f"Fase {phase}: " + list(checklist.keys())[phase-1].split(": ")[1]
-        tarefas = checklist[fase_atual]["Tarefas"]
-        
-        for tarefa in tarefas:
-            print(f"Executando tarefa: {tarefa}")
-            # Aqui você implementaria a lógica real de execução das tarefas
-        
-        checklist[fase_atual]["Status"] = "Concluído"
-        
-        with open('src/data/checklist.json', 'w') as f:
-            json.dump(checklist, f, indent=2)
+        # As instâncias vêm do pool do processo, emprestadas por tarefa em run_task
+        self.agents = agent_pool.pools
+        logger.info(f"Agentes gerados para a fase atual: {list(self.agents)}")
+
+    def select_agent(self, tarefa):
+        return select_agent(tarefa)
+
+    async def set_task_status(self, key, status, output=None, digest=None):
+        # Atualiza só a linha da tarefa; sem projeto não há estado persistido
+        if key in self.task_ids:
+            await in_session(checklist_store.set_task_status, self.task_ids[key], status, output, digest)
+        self.emit({"type": "task", "phase": key[0], "task": key[1], "status": status})
+
+    async def set_phase_status(self, phase, status):
+        if self.project_id is not None:
+            await in_session(checklist_store.set_phase_status, self.project_id, phase, status)
+        self.emit({"type": "phase", "phase": phase, "status": status})
+
+    def emit(self, event):
+        # Transições de fase/tarefa para GET /projects/{id}/events
+        if self.project_id is not None:
+            event_bus.publish(project_topic(self.project_id), {**event, "at": datetime.now().isoformat()})
+
+    async def run_task(self, key):
+        phase, tarefa = key
+        context = [self.results[dep] for dep in sorted(self.graph.dependencies[key]) if dep in self.results]
+        input_data = task_input(tarefa, context, task_project_inputs(phase, tarefa, self.project_inputs))
+        agent_type = self.select_agent(tarefa)
+        digest = input_hash(agent_type, input_data)
+        # Mesma entrada de uma execução anterior (fase interrompida ou feedback que
+        # não a afeta): reaproveitar a saída gravada em vez de pagar o LLM de novo
+        stored = self.outputs.get(key)
+        if stored is not None and stored[0] == digest:
+            self.results[key] = stored[1]
+            self.reused += 1
+            await self.set_task_status(key, checklist_store.STATUS_DONE)
+            return stored[1]
+        # O tamanho do pool limita quantas tarefas de cada tipo rodam ao mesmo tempo
+        async with agent_pool.checkout(agent_type, self.project_id) as agent:
+            logger.info(f"Executando tarefa: {tarefa} ({agent.name})")
+            await self.set_task_status(key, checklist_store.STATUS_IN_PROGRESS)
+            result = await agent.aprocess(input_data)
+            await agent.aupdate_memory(f"Fase {phase}/{tarefa}", result)
+        self.results[key] = result
+        # Checkpoint: saída gravada junto com o status e o hash da entrada, uma tarefa por vez
+        await self.set_task_status(key, checklist_store.STATUS_DONE, result, digest)
+        return result
+
+    def work_on_phase(self, phase, resume=True):
+        return run_sync(self.awork_on_phase(phase, resume))
+
+    async def awork_on_phase(self, phase, resume=True):
+        results = await self.awork_on_phases([phase], resume)
+        return {tarefa: result for (_, tarefa), result in results.items()}
+
+    async def awork_on_phases(self, phases, resume=True):
+        if AGENT_EXECUTION == "distributed" and self.project_id is not None:
+            queued = await in_session(task_queue.queue_phases, self.project_id, phases, resume)
+            logger.info(f"{queued} tarefa(s) da(s) Fase(s) {', '.join(map(str, phases))} enviadas aos runners")
+            return {}
+
+        logger.info(f"Agentes trabalhando na(s) Fase(s) {', '.join(map(str, phases))}")
+        self.reused = 0
+        if self.project_id is None:
+            checklist, self.task_ids = checklist_store.load_template(), {}
+            self.project_inputs, self.outputs = {}, {}
+        else:
+            checklist, self.task_ids, self.project_inputs, self.outputs = await in_session(
+                load_run_state, self.project_id, phases, resume)
+
+        for phase in phases:
+            await self.set_phase_status(phase, checklist_store.STATUS_IN_PROGRESS)
+
+        # Cada tarefa roda assim que suas dependências terminam; tarefas prontas
+        # rodam em paralelo, limitadas por max_concurrency
+        self.graph = TaskGraph.from_checklist(checklist, phases)
+        results, durations, self.metrics = await run_graph(self.graph, self.run_task, self.max_concurrency)
+        self.timings.update(durations)
+        logger.info(f"Fase(s) concluída(s) em {self.metrics['wall_time']:.2f}s ({self.metrics['tasks']} tarefas, "
+                    f"{self.reused} reaproveitada(s), "
+                    f"caminho crítico de {self.metrics['critical_path_length']} tarefas, "
+                    f"paralelismo {self.metrics['parallelism']:.1f}x)")
+
+        for phase in phases:
+            await self.set_phase_status(phase, checklist_store.STATUS_DONE)
+
+        return results
 
     def process_feedback(self, project_id, feedback):
-        print(f"Processando feedback para o projeto {project_id}: {feedback}")
-        # Aqui você implementaria a lógica de processamento do feedback
-        
-        self.current_phase += 1
-        self.start_phase(self.current_phase)
-        
+        return run_sync(self.aprocess_feedback(project_id, feedback))
+
+    async def aprocess_feedback(self, project_id, feedback):
+        logger.info(f"Processando feedback para o projeto {project_id}: {feedback}")
+        if feedback:
+            await in_session(record_feedback, project_id, feedback)
+        return await self.areprocess_project(project_id)
+
+    def reprocess_project(self, project_id):
+        return run_sync(self.areprocess_project(project_id))
+
+    async def areprocess_project(self, project_id):
+        self.project_id = project_id
+        self.current_phase = await in_session(current_phase, project_id) or self.current_phase
+
+        # Reexecução incremental: todas as fases até a atual passam pelo grafo, mas só
+        # rodam as tarefas cuja entrada mudou (campos do projeto, feedback ou contexto)
+        phases = list(range(1, min(self.current_phase, len(checklist_store.load_template())) + 1))
+        logger.info(f"Reavaliando Fase(s) {', '.join(map(str, phases))}")
+        self.generate_agents()
+        await self.awork_on_phases(phases)
+
         return self.current_phase
 
-# Adicione outros métodos conforme necessário
\ No newline at end of file
+# Adicione outros métodos conforme necessário
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import os
+from typing import Any, Callable, Optional
+
+from src.utils.cache import LRUCache
+from src.utils.metrics import registry
+
+# Limites da memória de cada agente (0 = sem limite de bytes / sem TTL)
+AGENT_MEMORY_SIZE = int(os.getenv("AGENT_MEMORY_SIZE", "256"))
+AGENT_MEMORY_MAX_BYTES = int(os.getenv("AGENT_MEMORY_MAX_BYTES", str(1024 * 1024)))
+AGENT_MEMORY_TTL = float(os.getenv("AGENT_MEMORY_TTL", "0"))
+# Com 1, a memória de agentes ligados a um projeto é persistida na tabela agent_memory
+# (SQLMemoryStore, em src/agents/agent_memory_sql.py)
+AGENT_MEMORY_SQL = os.getenv("AGENT_MEMORY_SQL", "0") == "1"
+AGENT_MEMORY_SQL_MAX_ROWS = int(os.getenv("AGENT_MEMORY_SQL_MAX_ROWS", "1000"))
+
+evictions = registry.counter("agent_memory_evictions_total", "Entradas removidas da memória dos agentes")
+summarized = registry.counter("agent_memory_summarized_total", "Entradas removidas incorporadas ao resumo")
+
+def value_size(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+class AgentMemory:
+    # Memória de trabalho de um agente: LRU limitada por número de entradas e
+    # por bytes, com TTL opcional. Entradas removidas podem ser condensadas por
+    # `summarize(resumo_atual, chave, valor) -> novo_resumo`, que deve devolver
+    # um texto de tamanho limitado. Com `store`, as gravações também vão para a
+    # camada persistente e leituras que faltam na LRU são buscadas nela.
+    def __init__(self, maxsize: int = AGENT_MEMORY_SIZE, max_bytes: Optional[int] = AGENT_MEMORY_MAX_BYTES,
+                 ttl: Optional[float] = AGENT_MEMORY_TTL,
+                 summarize: Optional[Callable[[str, str, Any], str]] = None,
+                 store=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.summarize = summarize
+        self.store = store
+        self.summary = ""
+        self._entries = LRUCache(maxsize, ttl or None, max_bytes=max_bytes or None, sizeof=value_size,
+                                 on_evict=self._evicted)
+
+    def _evicted(self, key, value):
+        evictions.inc()
+        if self.summarize is not None:
+            self.summary = self.summarize(self.summary, key, value)
+            summarized.inc()
+
+    def with_store(self, store=None) -> "AgentMemory":
+        # Memória vazia com os mesmos limites e resumidor, ligada a outra camada persistente
+        return AgentMemory(self.maxsize, self.max_bytes, self.ttl, self.summarize, store)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._entries.get(key)
+        if value is None and self.store is not None:
+            value = self.store.get(key)
+            if value is not None:
+                self._entries.set(key, value)
+        return default if value is None else value
+
+    def set(self, key: str, value: Any):
+        self._entries.set(key, value)
+        if self.store is not None:
+            self.store.set(key, value)
+
+    async def aset(self, key: str, value: Any):
+        # Gravação na camada persistente numa thread, fora do event loop
+        self._entries.set(key, value)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.set, key, value)
+
+    def delete(self, key: str):
+        self._entries.pop(key)
+        if self.store is not None:
+            self.store.delete(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.summary = ""
+        if self.store is not None:
+            self.store.clear()
+
+    def items(self):
+        return self._entries.items()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+def truncating_summarizer(max_chars: int = 2000) -> Callable[[str, str, Any], str]:
+    # Resumo mínimo sem LLM: acumula "chave: valor" e mantém só o final
+    def summarize(summary: str, key: str, value: Any) -> str:
+        return (summary + f"\n{key}: {value}")[-max_chars:]
+    return summarize
@@ -0,0 +1,68 @@
+import json
+import threading
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import select, delete
+from src.agents.agent_memory import AGENT_MEMORY_SQL_MAX_ROWS
+from src.utils.database import SessionLocal, DBAgentMemory
+
+# Fica fora de agent_memory para que quem só usa a memória em processo (ex.: os
+# filhos do pool de processos) não importe src.utils.database, que cria os
+# engines e as tabelas na importação
+
+class SQLMemoryStore:
+    # Camada persistente da memória de um agente num projeto. Guarda no máximo
+    # `max_rows` entradas (as atualizadas mais recentemente); a poda roda a cada
+    # `prune_every` escritas.
+    def __init__(self, agent: str, project_id: int, session_factory=SessionLocal,
+                 max_rows: int = AGENT_MEMORY_SQL_MAX_ROWS, prune_every: int = 50):
+        self.agent = agent
+        self.project_id = project_id
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _where(self, query):
+        return query.where(DBAgentMemory.agent == self.agent, DBAgentMemory.project_id == self.project_id)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.session_factory() as db:
+            value = db.execute(self._where(select(DBAgentMemory.value)).where(DBAgentMemory.key == key)).scalar()
+        return None if value is None else json.loads(value)
+
+    def set(self, key: str, value: Any):
+        with self.session_factory() as db:
+            entry = db.execute(self._where(select(DBAgentMemory)).where(DBAgentMemory.key == key)).scalar()
+            if entry is None:
+                entry = DBAgentMemory(agent=self.agent, project_id=self.project_id, key=key)
+                db.add(entry)
+            entry.value = json.dumps(value, ensure_ascii=False, default=str)
+            entry.updated_at = datetime.utcnow()
+            db.commit()
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % self.prune_every == 0
+        if should_prune:
+            self.prune()
+
+    def delete(self, key: str):
+        with self.session_factory() as db:
+            db.execute(self._where(delete(DBAgentMemory)).where(DBAgentMemory.key == key))
+            db.commit()
+
+    def clear(self):
+        with self.session_factory() as db:
+            db.execute(self._where(delete(DBAgentMemory)))
+            db.commit()
+
+    def prune(self):
+        with self.session_factory() as db:
+            cutoff = db.execute(self._where(select(DBAgentMemory.updated_at))
+                                .order_by(DBAgentMemory.updated_at.desc())
+                                .offset(self.max_rows).limit(1)).scalar()
+            if cutoff is not None:
+                db.execute(self._where(delete(DBAgentMemory)).where(DBAgentMemory.updated_at <= cutoff))
+                db.commit()
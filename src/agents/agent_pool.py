@@ -0,0 +1,137 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from src.agents.agent_critic import AgentCritic
+from src.agents.agent_researcher import AgentResearcher
+from src.utils.ai_integration import get_llm_client
+from src.utils.metrics import registry
+
+# Instâncias por tipo de agente no processo; também é o limite de tarefas
+# simultâneas daquele tipo. Ex.: AGENT_POOL_SIZES="Pesquisador=8,Crítico=2"
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "4"))
+AGENT_POOL_SIZES = dict(
+    (name.strip(), int(size)) for name, size in
+    (item.split("=", 1) for item in os.getenv("AGENT_POOL_SIZES", "").split(",") if "=" in item)
+)
+
+AGENT_TYPES = {"Pesquisador": AgentResearcher, "Crítico": AgentCritic}
+
+class AgentTypePool:
+    # Instâncias de um tipo de agente, criadas sob demanda até `max_size`.
+    # Pode ser usado de vários event loops (API, loop dos chamadores síncronos,
+    # workers): quem espera recebe a instância devolvida no próprio loop.
+    def __init__(self, name, factory, max_size):
+        self.name = name
+        self.factory = factory
+        self.max_size = max_size
+        self.created = 0
+        self._idle = []
+        self._waiters = deque()
+        self._lock = threading.Lock()
+        labels = {"agent": name}
+        self.wait = registry.histogram("agent_pool_wait_seconds", "Espera por uma instância livre", labels=labels)
+        registry.gauge("agent_pool_idle", "Instâncias livres", labels=labels, fn=lambda: len(self._idle))
+        registry.gauge("agent_pool_in_use", "Instâncias emprestadas", labels=labels,
+                       fn=lambda: self.created - len(self._idle))
+        registry.gauge("agent_pool_waiting", "Tarefas esperando instância", labels=labels,
+                       fn=lambda: len(self._waiters))
+
+    async def acquire(self):
+        start = time.perf_counter()
+        agent = waiter = None
+        with self._lock:
+            if self._idle:
+                agent = self._idle.pop()
+            elif self.created < self.max_size:
+                self.created += 1
+            else:
+                loop = asyncio.get_running_loop()
+                waiter = (loop, loop.create_future())
+                self._waiters.append(waiter)
+        if waiter is None:
+            self.wait.observe(time.perf_counter() - start)
+            if agent is not None:
+                return agent
+            try:
+                return self.factory()
+            except BaseException:
+                with self._lock:
+                    self.created -= 1
+                raise
+        try:
+            agent = await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                    served = False
+                except ValueError:
+                    served = True
+            # Já servido: se _handoff ainda não rodou, ele vê o future cancelado e devolve a
+            # instância; se já entregou (cancelado depois do set_result), devolver aqui
+            if served and waiter[1].done() and not waiter[1].cancelled():
+                self.release(waiter[1].result())
+            raise
+        self.wait.observe(time.perf_counter() - start)
+        return agent
+
+    def release(self, agent):
+        with self._lock:
+            if self._waiters:
+                loop, future = self._waiters.popleft()
+            else:
+                self._idle.append(agent)
+                return
+        loop.call_soon_threadsafe(self._handoff, future, agent)
+
+    def _handoff(self, future, agent):
+        # Roda no loop de quem esperava; se ele desistiu, a instância volta ao pool
+        if future.done():
+            self.release(agent)
+        else:
+            future.set_result(agent)
+
+    def warm(self, count=None):
+        count = self.max_size if count is None else min(count, self.max_size)
+        with self._lock:
+            missing = max(0, count - self.created)
+            self.created += missing
+        agents = [self.factory() for _ in range(missing)]
+        with self._lock:
+            self._idle.extend(agents)
+
+class AgentPool:
+    # Pool de agentes por processo, com empréstimo e devolução:
+    #
+    #   async with agent_pool.checkout("Pesquisador", project_id) as agent:
+    #       result = await agent.aprocess(...)
+    def __init__(self, agent_types=AGENT_TYPES, default_size=AGENT_POOL_SIZE, sizes=AGENT_POOL_SIZES):
+        self.pools = {name: AgentTypePool(name, factory, sizes.get(name, default_size))
+                      for name, factory in agent_types.items()}
+
+    @asynccontextmanager
+    async def checkout(self, agent_type, project_id=None):
+        pool = self.pools[agent_type]
+        agent = await pool.acquire()
+        try:
+            agent.bind_project(project_id)
+            yield agent
+        finally:
+            pool.release(agent)
+
+    async def warm_up(self):
+        # Cria as instâncias e a sessão HTTP do cliente LLM deste loop antes da primeira tarefa
+        for pool in self.pools.values():
+            pool.warm()
+        get_llm_client()._get_session()
+
+    def stats(self):
+        return {name: {"size": pool.max_size, "created": pool.created, "idle": len(pool._idle),
+                       "waiting": len(pool._waiters)}
+                for name, pool in self.pools.items()}
+
+agent_pool = AgentPool()
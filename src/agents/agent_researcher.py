@@ -1,21 +1,62 @@
 from src.agents.agent_base import AgentBase
-from src.utils.ai_integration import get_ai_response
+from src.utils.ai_integration import get_ai_response, aget_ai_response, aget_ai_response_stream
+from src.agents.pipeline import pipelined, fan_out
+
+# Subconsultas independentes da pesquisa no modo fanout
+RESEARCH_ASPECTS = ("background and current state", "risks and limitations", "best practices and recommendations")
 
 class AgentResearcher(AgentBase):
-    def __init__(self):
-        super().__init__("Researcher")
+    def __init__(self, mode=None, memory=None):
+        super().__init__("Researcher", mode, memory)
 
     def process(self, query):
         research_results = self.conduct_research(query)
         summary = self.summarize_findings(research_results)
         return summary
 
+    async def aprocess(self, query):
+        if self.mode == "pipelined":
+            _, summary = await pipelined(f"Conduct a comprehensive research on: {query}",
+                                         lambda findings: f"Summarize these research findings concisely: {findings}")
+            return summary
+        if self.mode == "fanout":
+            research_results = await self.aconduct_research_fanout(query)
+        else:
+            research_results = await self.aconduct_research(query)
+        summary = await self.asummarize_findings(research_results)
+        return summary
+
+    async def astream(self, query):
+        # A pesquisa é transmitida enquanto chega; o resumo começa quando ela termina
+        parts = []
+        async for token in aget_ai_response_stream(f"Conduct a comprehensive research on: {query}"):
+            parts.append(token)
+            yield "research", token
+        research_results = "".join(parts)
+        async for token in aget_ai_response_stream(f"Summarize these research findings concisely: {research_results}"):
+            yield "summary", token
+
     def conduct_research(self, query):
         prompt = f"Conduct a comprehensive research on: {query}"
         research_results = get_ai_response(prompt)
         return research_results
 
+    async def aconduct_research(self, query):
+        prompt = f"Conduct a comprehensive research on: {query}"
+        research_results = await aget_ai_response(prompt)
+        return research_results
+
+    async def aconduct_research_fanout(self, query):
+        findings = await fan_out([f"Conduct a comprehensive research on: {query}\n\nFocus only on: {aspect}"
+                                  for aspect in RESEARCH_ASPECTS])
+        return "\n\n".join(f"## {aspect}\n{finding}" for aspect, finding in zip(RESEARCH_ASPECTS, findings))
+
     def summarize_findings(self, research_results):
         prompt = f"Summarize these research findings concisely: {research_results}"
         summary = get_ai_response(prompt)
-        return summary
\ No newline at end of file
+        return summary
+
+    async def asummarize_findings(self, research_results):
+        prompt = f"Summarize these research findings concisely: {research_results}"
+        summary = await aget_ai_response(prompt)
+        return summary
@@ -0,0 +1,57 @@
+import json
+import re
+
+from src.agents.agent_base import AgentBase
+
+# Estrutura esperada do projeto.json (ver process_project_with_gpt)
+PROJECT_TEXT_FIELDS = ("Nome do Projeto", "Descrição", "Público-Alvo", "Prazo Estimado", "Orçamento Estimado")
+PROJECT_LIST_FIELDS = ("Objetivos Principais", "Escopo do Projeto", "Tecnologias Principais", "Funcionalidades Chave",
+                       "Requisitos Especiais", "Riscos Potenciais", "Métricas de Sucesso", "Stakeholders Principais")
+
+class AgentValidator(AgentBase):
+    # Valida e pontua o projeto.json gerado. É só CPU (parse + varredura de todos
+    # os campos), então roda no pool de processos em vez de no event loop.
+    cpu_bound = True
+
+    def __init__(self, mode=None, memory=None):
+        super().__init__("Validator", mode, memory)
+        self.placeholder = None
+
+    def warm_up(self):
+        # Campos que ainda trazem o texto do template: "{Objetivo 1}"
+        self.placeholder = re.compile(r"^\s*\{[^{}]*\}\s*$")
+
+    def process(self, projeto):
+        if self.placeholder is None:
+            self.warm_up()
+        if isinstance(projeto, (str, bytes)):
+            try:
+                projeto = json.loads(projeto)
+            except ValueError as exc:
+                return {"valid": False, "errors": [f"JSON inválido: {exc}"], "score": 0.0}
+        if not isinstance(projeto, dict):
+            return {"valid": False, "errors": ["projeto.json deve ser um objeto"], "score": 0.0}
+
+        errors = []
+        filled = 0
+        for field in PROJECT_TEXT_FIELDS:
+            value = projeto.get(field)
+            if not isinstance(value, str) or not value.strip():
+                errors.append(f"{field}: texto obrigatório")
+            elif self.placeholder.match(value):
+                errors.append(f"{field}: não preenchido")
+            else:
+                filled += 1
+        for field in PROJECT_LIST_FIELDS:
+            value = projeto.get(field)
+            if not isinstance(value, list) or not value:
+                errors.append(f"{field}: lista obrigatória")
+                continue
+            pending = [item for item in value if not isinstance(item, str) or self.placeholder.match(item)]
+            if pending:
+                errors.append(f"{field}: {len(pending)} item(ns) não preenchido(s)")
+            else:
+                filled += 1
+
+        total = len(PROJECT_TEXT_FIELDS) + len(PROJECT_LIST_FIELDS)
+        return {"valid": not errors, "errors": errors, "score": filled / total}
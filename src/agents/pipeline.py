@@ -0,0 +1,52 @@
+import asyncio
+import os
+
+# Modo de encadeamento dos prompts dos agentes:
+#   sequential - etapa B só começa com a saída completa da etapa A (comportamento antigo)
+#   pipelined  - a etapa B processa cada trecho da saída de A assim que ele chega
+#   fanout     - a etapa A é dividida em subconsultas independentes disparadas em paralelo
+AGENT_PIPELINE_MODE = os.getenv("AGENT_PIPELINE_MODE", "sequential")
+PIPELINE_MODES = ("sequential", "pipelined", "fanout")
+# Tamanho mínimo de um trecho entregue à etapa B no modo pipelined
+PIPELINE_CHUNK_CHARS = int(os.getenv("PIPELINE_CHUNK_CHARS", "800"))
+# Limite de tokens por subconsulta no modo fanout (0 = sem limite)
+PIPELINE_FANOUT_MAX_TOKENS = int(os.getenv("PIPELINE_FANOUT_MAX_TOKENS", "0"))
+
+def split_ready(buffer, chunk_chars):
+    # Corta no último fim de parágrafo, desde que o trecho já tenha o tamanho mínimo
+    cut = buffer.rfind("\n\n")
+    if cut < 0 or cut < chunk_chars:
+        return None, buffer
+    return buffer[:cut], buffer[cut + 2:]
+
+async def pipelined(first_prompt, second_prompt, chunk_chars=PIPELINE_CHUNK_CHARS):
+    # Transmite a etapa A e, a cada trecho fechado, dispara a etapa B sobre ele
+    # enquanto o resto de A ainda está sendo gerado. O resultado é a junção das
+    # saídas parciais de B, na ordem dos trechos.
+    # ai_integration importa src.utils.database; aqui dentro para que agent_base (que
+    # usa as constantes deste módulo) não o carregue nos filhos do pool de processos
+    from src.utils.ai_integration import aget_ai_response, aget_ai_response_stream
+    first_parts = []
+    partials = []
+    buffer = ""
+    try:
+        async for token in aget_ai_response_stream(first_prompt):
+            first_parts.append(token)
+            buffer += token
+            chunk, buffer = split_ready(buffer, chunk_chars)
+            if chunk is not None:
+                partials.append(asyncio.create_task(aget_ai_response(second_prompt(chunk))))
+        if buffer.strip() or not partials:
+            partials.append(asyncio.create_task(aget_ai_response(second_prompt(buffer))))
+        outputs = await asyncio.gather(*partials)
+    except BaseException:
+        for task in partials:
+            task.cancel()
+        raise
+    return "".join(first_parts), "\n\n".join(outputs)
+
+async def fan_out(prompts, max_tokens=None):
+    from src.utils.ai_integration import aget_ai_response
+    max_tokens = PIPELINE_FANOUT_MAX_TOKENS if max_tokens is None else max_tokens
+    params = {"max_tokens": max_tokens} if max_tokens else {}
+    return await asyncio.gather(*(aget_ai_response(prompt, **params) for prompt in prompts))
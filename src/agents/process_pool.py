@@ -0,0 +1,127 @@
+import asyncio
+import atexit
+import importlib
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from src.utils.metrics import registry
+
+# Pool de processos para agentes com cpu_bound = True: o trabalho de CPU sai do
+# event loop (e do GIL) da API/worker
+AGENT_PROCESS_WORKERS = int(os.getenv("AGENT_PROCESS_WORKERS", str(os.cpu_count() or 2)))
+# Resultados a partir deste tamanho voltam por memória compartilhada em vez do pipe
+AGENT_PROCESS_SHM_THRESHOLD = int(os.getenv("AGENT_PROCESS_SHM_THRESHOLD", str(1024 * 1024)))
+
+shm_bytes = registry.counter("agent_process_shm_bytes_total", "Bytes de resultados devolvidos por memória compartilhada")
+
+# Estado do processo filho: uma instância aquecida por classe de agente
+_worker_agents = {}
+
+def _agent_path(agent_class):
+    return agent_class.__module__, agent_class.__qualname__
+
+def _get_agent(path):
+    agent = _worker_agents.get(path)
+    if agent is None:
+        module, qualname = path
+        agent_class = importlib.import_module(module)
+        for name in qualname.split("."):
+            agent_class = getattr(agent_class, name)
+        agent = _worker_agents[path] = agent_class()
+        agent.warm_up()
+    return agent
+
+def _init_worker(paths):
+    for path in paths:
+        _get_agent(path)
+
+def _pack(result):
+    # Texto e bytes grandes vão crus; o resto usa pickle protocolo 5, com os
+    # buffers fora de banda (objetos com PickleBuffer, ex.: arrays numpy)
+    # copiados direto para a memória compartilhada em vez de serializados no pipe
+    if isinstance(result, (str, bytes, bytearray)):
+        if len(result) < AGENT_PROCESS_SHM_THRESHOLD:
+            return ("inline", result)
+        kind = type(result).__name__
+        buffers = [memoryview(result.encode("utf-8") if kind == "str" else result)]
+        header = None
+    else:
+        pickle_buffers = []
+        header = pickle.dumps(result, protocol=5, buffer_callback=pickle_buffers.append)
+        buffers = [buffer.raw() for buffer in pickle_buffers]
+        if sum(buffer.nbytes for buffer in buffers) < AGENT_PROCESS_SHM_THRESHOLD:
+            return ("inline", result)
+        kind = "pickle"
+    sizes = [buffer.nbytes for buffer in buffers]
+    shm = shared_memory.SharedMemory(create=True, size=max(1, sum(sizes)))
+    offset = 0
+    for buffer, size in zip(buffers, sizes):
+        shm.buf[offset:offset + size] = buffer.cast("B")
+        offset += size
+    shm.close()
+    return (kind, header, shm.name, sizes)
+
+def _unpack(packed):
+    kind = packed[0]
+    if kind == "inline":
+        return packed[1]
+    _, header, name, sizes = packed
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        views = []
+        offset = 0
+        for size in sizes:
+            views.append(shm.buf[offset:offset + size])
+            offset += size
+        # Uma única cópia: da memória compartilhada para o objeto final
+        if kind == "str":
+            result = str(views[0], "utf-8")
+        elif kind == "bytes":
+            result = bytes(views[0])
+        elif kind == "bytearray":
+            result = bytearray(views[0])
+        else:
+            # Copiar antes de soltar o segmento: objetos reconstruídos (ex.: arrays)
+            # não podem continuar apontando para ele
+            result = pickle.loads(header, buffers=[bytearray(view) for view in views])
+        shm_bytes.inc(sum(sizes))
+        for view in views:
+            view.release()
+        return result
+    finally:
+        shm.close()
+        shm.unlink()
+
+def _run(path, input_data):
+    return _pack(_get_agent(path).process(input_data))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor(warm_classes=()):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: os filhos não herdam conexões de banco nem loops do pai
+            _executor = ProcessPoolExecutor(max_workers=AGENT_PROCESS_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_init_worker,
+                                            initargs=([_agent_path(cls) for cls in warm_classes],))
+            atexit.register(_executor.shutdown)
+    return _executor
+
+async def run_in_process(agent_class, input_data):
+    # Executa agent_class.process(input_data) numa instância aquecida de um processo filho
+    histogram = registry.histogram("agent_process_seconds", "Duração de process() no pool de processos",
+                                   labels={"agent": agent_class.__name__})
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    packed = await loop.run_in_executor(get_executor([agent_class]), _run, _agent_path(agent_class), input_data)
+    result = _unpack(packed)
+    histogram.observe(time.perf_counter() - start)
+    return result
@@ -0,0 +1,166 @@
+import asyncio
+import re
+import time
+from collections import defaultdict
+
+from src.utils.metrics import registry
+
+# Referência a tarefa de outra fase dentro de "Dependencias": "Fase 3/Definir estrutura de dados"
+CROSS_PHASE_REF = re.compile(r"^Fase (\d+)/(.+)$")
+
+# Métricas de cada execução de run_graph, no registry do processo (ex.: GET /metrics)
+critical_path_tasks = registry.histogram("agent_graph_critical_path_tasks", "Tarefas no caminho crítico do grafo",
+                                         buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55))
+critical_path_seconds = registry.histogram("agent_graph_critical_path_seconds", "Duração do caminho crítico do grafo",
+                                           buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600))
+graph_parallelism = registry.histogram("agent_graph_parallelism",
+                                       "Paralelismo alcançado (tempo somado das tarefas / tempo de parede)",
+                                       buckets=(1, 1.5, 2, 3, 4, 6, 8, 12, 16, 32))
+
+class CycleError(ValueError):
+    pass
+
+class TaskGraph:
+    # Grafo de dependências entre tarefas do checklist. Cada tarefa é
+    # identificada pela chave (fase, descrição).
+    def __init__(self):
+        self.tasks = {}
+        self.dependencies = defaultdict(set)
+        self.dependents = defaultdict(set)
+
+    def add_task(self, phase, description):
+        key = (phase, description)
+        self.tasks[key] = description
+        return key
+
+    def add_dependency(self, key, depends_on):
+        if key not in self.tasks or depends_on not in self.tasks:
+            raise KeyError(f"Tarefa desconhecida na dependência {depends_on} -> {key}")
+        self.dependencies[key].add(depends_on)
+        self.dependents[depends_on].add(key)
+
+    @classmethod
+    def from_checklist(cls, checklist, phases):
+        # Fases com a chave "Dependencias" declaram o grafo explicitamente; nas
+        # demais, toda tarefa depende de todas as tarefas da fase anterior
+        # incluída na execução (barreira de fase, o comportamento antigo).
+        graph = cls()
+        phase_names = list(checklist.keys())
+        phase_tasks = {}
+        for phase in phases:
+            phase_tasks[phase] = [graph.add_task(phase, tarefa)
+                                  for tarefa in checklist[phase_names[phase - 1]]["Tarefas"]]
+
+        previous = None
+        for phase in phases:
+            fase = checklist[phase_names[phase - 1]]
+            declared = fase.get("Dependencias")
+            if declared is None:
+                if previous is not None:
+                    for key in phase_tasks[phase]:
+                        for dep in phase_tasks[previous]:
+                            graph.add_dependency(key, dep)
+            else:
+                for tarefa, deps in declared.items():
+                    for dep in deps:
+                        match = CROSS_PHASE_REF.match(dep)
+                        dep_key = (int(match.group(1)), match.group(2)) if match else (phase, dep)
+                        # Dependências de fases fora desta execução já foram cumpridas
+                        if dep_key[0] in phase_tasks:
+                            graph.add_dependency((phase, tarefa), dep_key)
+            previous = phase
+        return graph
+
+    def topological_order(self):
+        remaining = {key: len(self.dependencies[key]) for key in self.tasks}
+        ready = [key for key, count in remaining.items() if count == 0]
+        order = []
+        while ready:
+            key = ready.pop(0)
+            order.append(key)
+            for dependent in self.dependents[key]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.tasks):
+            raise CycleError("Dependências circulares entre tarefas do checklist")
+        return order
+
+    def critical_path(self, durations=None):
+        # Caminho mais longo do grafo; sem durações, cada tarefa vale 1
+        durations = durations or {}
+        finish = {}
+        previous = {}
+        for key in self.topological_order():
+            start = 0.0
+            for dep in self.dependencies[key]:
+                if finish[dep] > start:
+                    start = finish[dep]
+                    previous[key] = dep
+            finish[key] = start + durations.get(key, 1.0)
+        if not finish:
+            return 0.0, []
+        end = max(finish, key=finish.get)
+        path = [end]
+        while path[-1] in previous:
+            path.append(previous[path[-1]])
+        return finish[end], list(reversed(path))
+
+async def run_graph(graph, run_task, max_concurrency):
+    # Executa `run_task(key)` para cada tarefa assim que todas as suas
+    # dependências terminam; tarefas prontas rodam em paralelo até o limite.
+    graph.topological_order()  # falha cedo se houver ciclo
+    semaphore = asyncio.Semaphore(max_concurrency)
+    remaining = {key: len(graph.dependencies[key]) for key in graph.tasks}
+    results = {}
+    durations = {}
+    running = 0
+    peak = 0
+
+    async def run(key):
+        nonlocal running, peak
+        async with semaphore:
+            running += 1
+            peak = max(peak, running)
+            start = time.perf_counter()
+            try:
+                results[key] = await run_task(key)
+            finally:
+                durations[key] = time.perf_counter() - start
+                running -= 1
+        return key
+
+    start = time.perf_counter()
+    pending = {asyncio.create_task(run(key)) for key, count in remaining.items() if count == 0}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                key = task.result()
+                for dependent in graph.dependents[key]:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        pending.add(asyncio.create_task(run(dependent)))
+    except BaseException:
+        for task in pending:
+            task.cancel()
+        raise
+    wall_time = time.perf_counter() - start
+
+    critical_path_time, critical_path = graph.critical_path(durations)
+    metrics = {
+        "tasks": len(graph.tasks),
+        "wall_time": wall_time,
+        "total_task_time": sum(durations.values()),
+        "critical_path_length": len(critical_path),
+        "critical_path_time": critical_path_time,
+        "critical_path": critical_path,
+        # Paralelismo alcançado: tempo somado das tarefas / tempo de parede
+        "parallelism": sum(durations.values()) / wall_time if wall_time else 0.0,
+        "peak_concurrency": peak,
+    }
+    if graph.tasks:
+        critical_path_tasks.observe(metrics["critical_path_length"])
+        critical_path_seconds.observe(critical_path_time)
+        graph_parallelism.observe(metrics["parallelism"])
+    return results, durations, metrics
@@ -1,18 +1,32 @@
-from fastapi import FastAPI, HTTPException, Depends, status, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 from pydantic.class_validators import validator
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, delete, tuple_, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pathlib import Path
-from src.utils.database import get_db, DBUser, DBProject
-from src.utils.ai_integration import process_project_with_gpt
-from src.agents.agent_manager import AgentManager
+import asyncio
+import csv
+import io
+import json
+import logging
+import time
+from src.utils.database import get_async_db, AsyncSessionLocal, DBUser, DBProject, DBJob, DBChecklistPhase, DBChecklistTask
+from src.utils import job_queue, checklist_store
+from src.utils.metrics import registry
+from src.utils.password_hashing import password_hasher, PasswordHasherBusy
+from src.utils.token_cache import auth_cache
+from src.utils.artifact_store import artifact_store
+from src.utils.events import event_bus, project_topic
+from src.utils.pagination import encode_cursor, decode_cursor, InvalidCursor
+from src.agents.agent_pool import agent_pool
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
@@ -25,7 +39,6 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 static_dir = Path(__file__).resolve().parent.parent.parent / "static"
 app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 # Modelos Pydantic
@@ -82,14 +95,43 @@ class Project(ProjectBase):
 
     class Config:
         from_attributes = True  # Atualizado de orm_mode para from_attributes
-        
-# Funções de segurança
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+class ProjectCreated(Project):
+    job_id: int
+
+class ProjectUpdated(Project):
+    current_phase: Optional[int] = None
+    job_id: int
+
+class Job(BaseModel):
+    id: int
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class AgentStreamRequest(BaseModel):
+    input: str = Field(..., min_length=1)
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: str  # created | updated | deleted | invalid | not_found
+    id: Optional[int] = None
+    job_id: Optional[int] = None
+    errors: Optional[List[dict]] = None
+        
+@app.on_event("startup")
+async def warm_agent_pool():
+    await agent_pool.warm_up()
 
+# Funções de segurança (hash e verificação de senha: src/utils/password_hashing.py)
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -100,29 +142,73 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    start = time.perf_counter()
+    # Token já validado recentemente: pula o jwt.decode
+    username = auth_cache.get_username(token)
+    if username is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+            token_data = TokenData(username=username)
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
-    user = db.query(DBUser).filter(DBUser.username == token_data.username).first()
+        auth_cache.set_username(token, token_data.username, payload.get("exp"))
+    user = auth_cache.get_user(username)
+    hit = user is not None
     if user is None:
+        user = (await db.execute(select(DBUser).where(DBUser.username == username))).scalars().first()
+        if user is None:
+            raise credentials_exception
+        auth_cache.set_user(username, user)
+    if user.is_active is False:
         raise credentials_exception
+    auth_cache.observe(hit, time.perf_counter() - start)
     return user
 
+SSE_KEEPALIVE_SECONDS = 15
+# Fases e tarefas rodam nos processos de src/worker.py e src/runner.py: um poller
+# por projeto consulta as linhas alteradas no banco com este intervalo
+SSE_POLL_SECONDS = 1
+
+STREAMING_AGENTS = {"researcher": "Pesquisador", "critic": "Crítico"}
+
+BULK_MAX_ITEMS = 5000
+BULK_JOB_COLUMNS = ["kind", "payload", "status", "attempts", "max_attempts", "run_after", "created_at", "updated_at",
+                    "serial_key"]
+
+EXPORT_FIELDS = ["id", "name", "description", "deadline", "status", "current_phase", "created_at", "updated_at"]
+EXPORT_BATCH_SIZE = 1000
+
+def project_job_key(project_id: int) -> str:
+    # Jobs do mesmo projeto rodam em ordem: a reexecução de um PUT espera o processamento inicial
+    return f"project:{project_id}"
+
+def export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def filter_projects(query, status_filter=None, current_phase=None, deadline_from=None, deadline_to=None):
+    if status_filter is not None:
+        query = query.where(DBProject.status == status_filter)
+    if current_phase is not None:
+        query = query.where(DBProject.current_phase == current_phase)
+    if deadline_from is not None:
+        query = query.where(DBProject.deadline >= deadline_from)
+    if deadline_to is not None:
+        query = query.where(DBProject.deadline <= deadline_to)
+    return query
+
 # Rotas
 
-@app.post("/projects", response_model=Project)
-async def create_project(project: ProjectCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@app.post("/projects", response_model=ProjectCreated, status_code=status.HTTP_202_ACCEPTED)
+async def create_project(project: ProjectCreate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     project_data = project.dict()
     db_project = DBProject(
         **project_data,
@@ -132,76 +218,349 @@ async def create_project(project: ProjectCreate, current_user: User = Depends(ge
         updated_at=datetime.now()
     )
     db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
-
-    # Iniciar o processamento do projeto em background
-    background_tasks = BackgroundTasks()
-    background_tasks.add_task(process_project, db_project.id)
-
-    return db_project
-
+    await db.flush()
+
+    # Processamento do projeto vai para a fila (src/worker.py) na mesma transação
+    job = job_queue.new_job("process_project", {"project_id": db_project.id}, serial_key=project_job_key(db_project.id))
+    db.add(job)
+    await db.commit()
+
+    return ProjectCreated(**Project.model_validate(db_project).model_dump(), job_id=job.id)
+
+
+def validation_errors(error: ValidationError):
+    return [{"loc": list(err["loc"]), "msg": err["msg"], "type": err["type"]} for err in error.errors()]
+
+def check_bulk_size(items):
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"At most {BULK_MAX_ITEMS} items per bulk request")
+
+# Rotas em lote: validam tudo numa passada e gravam com um INSERT/UPDATE/DELETE
+# multi-linha numa única transação; o resultado é reportado item a item
+@app.post("/projects/bulk", response_model=List[BulkItemResult])
+async def bulk_create_projects(items: List[dict], current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    check_bulk_size(items)
+    results = [None] * len(items)
+    rows = []
+    indexes = []
+    now = datetime.now()
+    for index, item in enumerate(items):
+        try:
+            project = ProjectCreate.model_validate(item)
+        except ValidationError as e:
+            results[index] = BulkItemResult(index=index, status="invalid", errors=validation_errors(e))
+            continue
+        rows.append({**project.dict(), "status": "Iniciado", "current_phase": 1, "created_at": now, "updated_at": now})
+        indexes.append(index)
+
+    if rows:
+        ids = (await db.execute(insert(DBProject).returning(DBProject.id, sort_by_parameter_order=True), rows)).scalars().all()
+        jobs = [job_queue.new_job("process_project", {"project_id": project_id}, serial_key=project_job_key(project_id))
+                for project_id in ids]
+        job_ids = (await db.execute(
+            insert(DBJob).returning(DBJob.id, sort_by_parameter_order=True),
+            [{column: getattr(job, column) for column in BULK_JOB_COLUMNS} for job in jobs],
+        )).scalars().all()
+        await db.commit()
+        for index, project_id, job_id in zip(indexes, ids, job_ids):
+            results[index] = BulkItemResult(index=index, status="created", id=project_id, job_id=job_id)
+    return results
+
+@app.patch("/projects/bulk", response_model=List[BulkItemResult])
+async def bulk_update_projects(items: List[dict], current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    check_bulk_size(items)
+    results = [None] * len(items)
+    updates = {}
+    now = datetime.now()
+    for index, item in enumerate(items):
+        item = dict(item)
+        project_id = item.pop("id", None)
+        try:
+            project_update = ProjectUpdate.model_validate(item)
+        except ValidationError as e:
+            results[index] = BulkItemResult(index=index, status="invalid", id=project_id, errors=validation_errors(e))
+            continue
+        if not isinstance(project_id, int) or project_update.feedback is not None:
+            detail = "feedback is not supported in bulk updates" if isinstance(project_id, int) else "id is required"
+            results[index] = BulkItemResult(index=index, status="invalid", id=project_id, errors=[{"msg": detail}])
+            continue
+        updates[index] = {"id": project_id, **project_update.dict(exclude_unset=True, exclude={"feedback"}), "updated_at": now}
+
+    existing = set()
+    if updates:
+        ids = [row["id"] for row in updates.values()]
+        existing = set((await db.execute(select(DBProject.id).where(DBProject.id.in_(ids)))).scalars())
+    # UPDATE por chave primária em executemany, agrupado pelo conjunto de colunas alteradas
+    batches = {}
+    for index, row in updates.items():
+        if row["id"] in existing:
+            batches.setdefault(tuple(sorted(row)), []).append(row)
+            results[index] = BulkItemResult(index=index, status="updated", id=row["id"])
+        else:
+            results[index] = BulkItemResult(index=index, status="not_found", id=row["id"])
+    for rows in batches.values():
+        await db.execute(update(DBProject), rows)
+    await db.commit()
+    return results
+
+@app.delete("/projects/bulk", response_model=List[BulkItemResult])
+async def bulk_delete_projects(ids: List[int], current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    check_bulk_size(ids)
+    deleted = set((await db.execute(delete(DBProject).where(DBProject.id.in_(ids)).returning(DBProject.id))).scalars())
+    await db.execute(job_queue.cancel_queued([project_job_key(project_id) for project_id in deleted]))
+    await db.commit()
+    for project_id in deleted:
+        artifact_store.delete(project_id)
+    return [BulkItemResult(index=index, status="deleted" if project_id in deleted else "not_found", id=project_id)
+            for index, project_id in enumerate(ids)]
+
+# Declarada antes de /projects/{project_id} para não ser capturada por ela
+@app.get("/projects/export")
+async def export_projects(format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+                          status_filter: Optional[str] = Query(None, alias="status"), current_phase: Optional[int] = None,
+                          deadline_from: Optional[datetime] = None, deadline_to: Optional[datetime] = None,
+                          current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    # Mesma sessão usada por get_current_user: devolver a conexão ao pool antes do streaming
+    await db.close()
+    columns = [getattr(DBProject, field) for field in EXPORT_FIELDS]
+    query = filter_projects(select(*columns), status_filter, current_phase, deadline_from, deadline_to)
+    # yield_per + stream: cursor no servidor, lotes de tamanho fixo, memória constante
+    query = query.order_by(DBProject.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    async def generate():
+        # Sessão própria, aberta só durante o streaming
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(query)
+            if format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(EXPORT_FIELDS)
+                async for rows in result.partitions():
+                    writer.writerows([export_value(value) for value in row] for row in rows)
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                if buffer.tell():
+                    yield buffer.getvalue()
+            else:
+                async for rows in result.partitions():
+                    yield "".join(json.dumps(dict(zip(EXPORT_FIELDS, map(export_value, row))), ensure_ascii=False) + "\n"
+                                  for row in rows)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(generate(), media_type=media_type,
+                             headers={"Content-Disposition": f"attachment; filename=projects.{format}"})
 
 @app.get("/projects/{project_id}", response_model=Project)
-async def read_project(project_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    project = db.query(DBProject).filter(DBProject.id == project_id).first()
+async def read_project(project_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    project = await db.get(DBProject, project_id)
     if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
 
-@app.put("/projects/{project_id}", response_model=Project)
-async def update_project(project_id: int, project_update: ProjectUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db_project = db.query(DBProject).filter(DBProject.id == project_id).first()
+@app.put("/projects/{project_id}", response_model=ProjectUpdated, status_code=status.HTTP_202_ACCEPTED)
+async def update_project(project_id: int, project_update: ProjectUpdate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    db_project = await db.get(DBProject, project_id)
     if db_project is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    
-    # Process feedback and move to next phase
-    agent_manager = AgentManager()
-    next_phase = agent_manager.process_feedback(db_project.id, project_update.feedback)
-    
-    db_project.current_phase = next_phase
-    db_project.updated_at = datetime.now()
-    db.commit()
-    db.refresh(db_project)
-    
-    return db_project
-
-def process_project(project_id: int):
-    db = next(get_db())
-    project = db.query(DBProject).filter(DBProject.id == project_id).first()
-    
-    # Process with GPT-4
-    process_project_with_gpt(project)
-    
-    # Start agent manager
-    agent_manager = AgentManager()
-    agent_manager.process_project(project_id)
-
-@app.post("/projects", response_model=Project)
-async def create_project(project: ProjectCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    # Criar projeto no banco de dados
-    db_project = DBProject(**project.dict(), created_at=datetime.now(), updated_at=datetime.now())
-    db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
-
-    # Processar projeto com GPT-4 e preencher projeto.json
-    process_project_with_gpt(db_project)
 
-    # Iniciar o AgentManager para processar o projeto
-    agent_manager = AgentManager()
-    agent_manager.process_project(db_project.id)
+    for key, value in project_update.dict(exclude_unset=True, exclude={"feedback"}).items():
+        setattr(db_project, key, value)
+    # O feedback é sobre a fase atual: fica gravado nela e libera a próxima
+    if project_update.feedback:
+        phase = db_project.current_phase or 1
+        await db.run_sync(checklist_store.set_phase_feedback, project_id, phase, project_update.feedback, commit=False)
+        db_project.current_phase = phase + 1
+    db_project.updated_at = datetime.now()
 
-    return db_project
+    # Reexecução incremental no worker (só as tarefas cuja entrada mudou), na mesma
+    # transação e depois de qualquer job ainda pendente do projeto
+    job = job_queue.new_job("reprocess_project", {"project_id": project_id}, serial_key=project_job_key(project_id))
+    db.add(job)
+    await db.commit()
+
+    return ProjectUpdated(**Project.model_validate(db_project).model_dump(), current_phase=db_project.current_phase,
+                          job_id=job.id)
+
+async def get_stream_user(request: Request, token: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    # EventSource não envia cabeçalhos: aceita o token também em ?token=
+    authorization = request.headers.get("Authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated",
+                            headers={"WWW-Authenticate": "Bearer"})
+    return await get_current_user(token, db)
+
+def sse_message(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+async def checklist_changes(project_id: int, since: Optional[datetime]):
+    # Transições gravadas por qualquer processo desde `since`, no formato dos eventos do AgentManager
+    async with AsyncSessionLocal() as db:
+        phases = select(DBChecklistPhase.phase, DBChecklistPhase.status, DBChecklistPhase.updated_at).where(
+            DBChecklistPhase.project_id == project_id)
+        tasks = select(DBChecklistTask.phase, DBChecklistTask.description, DBChecklistTask.status,
+                       DBChecklistTask.updated_at).where(DBChecklistTask.project_id == project_id)
+        if since is not None:
+            phases = phases.where(DBChecklistPhase.updated_at >= since)
+            tasks = tasks.where(DBChecklistTask.updated_at >= since)
+        phase_rows = (await db.execute(phases)).all()
+        task_rows = (await db.execute(tasks.order_by(DBChecklistTask.updated_at))).all()
+    events = [{"type": "phase", "phase": phase, "status": phase_status, "at": updated_at.isoformat()}
+              for phase, phase_status, updated_at in phase_rows]
+    events += [{"type": "task", "phase": phase, "task": task, "status": task_status, "at": updated_at.isoformat()}
+               for phase, task, task_status, updated_at in task_rows]
+    latest = max([row[-1] for row in phase_rows + task_rows], default=since)
+    return events, latest
+
+def event_key(event: dict):
+    return event["type"], event["phase"], event.get("task")
+
+class ChecklistPoller:
+    # Uma consulta ao banco por projeto, compartilhada por todas as conexões SSE dele:
+    # as transições gravadas pelos workers e runners vão para o event_bus como as do
+    # próprio processo. Começa com o primeiro assinante e para quando o último sai.
+    def __init__(self, interval: float = SSE_POLL_SECONDS):
+        self.interval = interval
+        self._tasks = {}
+        self._subscribers = {}
+        registry.gauge("sse_checklist_pollers", "Projetos com consulta ao checklist ativa",
+                       fn=lambda: len(self._tasks))
+
+    def acquire(self, project_id: int, since: Optional[datetime]):
+        self._subscribers[project_id] = self._subscribers.get(project_id, 0) + 1
+        task = self._tasks.get(project_id)
+        if task is None or task.done():
+            self._tasks[project_id] = asyncio.create_task(self._poll(project_id, since))
+
+    def release(self, project_id: int):
+        self._subscribers[project_id] -= 1
+        if self._subscribers[project_id] <= 0:
+            del self._subscribers[project_id]
+            task = self._tasks.pop(project_id, None)
+            if task is not None:
+                task.cancel()
+
+    async def _poll(self, project_id: int, since: Optional[datetime]):
+        # Linhas com updated_at == since voltam a cada consulta: só republicar o que mudou
+        published = {}
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                events, since = await checklist_changes(project_id, since)
+            except Exception:
+                logger.exception(f"Falha ao consultar o checklist do projeto {project_id}")
+                continue
+            for event in events:
+                if published.get(event_key(event)) != event["status"]:
+                    published[event_key(event)] = event["status"]
+                    event_bus.publish(project_topic(project_id), event)
+
+checklist_poller = ChecklistPoller()
+
+@app.get("/projects/{project_id}/events")
+async def stream_project_events(project_id: int, request: Request, current_user: User = Depends(get_stream_user),
+                                db: AsyncSession = Depends(get_async_db)):
+    if await db.get(DBProject, project_id) is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    # Assinar antes do snapshot para não perder transições entre os dois
+    subscription = event_bus.subscribe(project_topic(project_id))
+    phases = (await db.execute(select(DBChecklistPhase.phase, DBChecklistPhase.status)
+                               .where(DBChecklistPhase.project_id == project_id)
+                               .order_by(DBChecklistPhase.phase))).all()
+    snapshot = {"type": "snapshot", "phases": [{"phase": phase, "status": phase_status} for phase, phase_status in phases]}
+    # Estado já conhecido pelo cliente e ponto de partida da consulta ao banco
+    sent = {("phase", phase, None): phase_status for phase, phase_status in phases}
+    tasks = (await db.execute(select(DBChecklistTask.phase, DBChecklistTask.description, DBChecklistTask.status)
+                              .where(DBChecklistTask.project_id == project_id))).all()
+    sent.update({("task", phase, task): task_status for phase, task, task_status in tasks})
+    since = None
+    for table in (DBChecklistPhase, DBChecklistTask):
+        updated_at = (await db.execute(select(func.max(table.updated_at)).where(table.project_id == project_id))).scalar()
+        if updated_at is not None and (since is None or updated_at > since):
+            since = updated_at
+    # A sessão só é fechada pela dependência depois da resposta: devolver a
+    # conexão ao pool agora em vez de segurá-la enquanto o stream estiver aberto
+    await db.close()
+
+    async def generate():
+        # Eventos do próprio processo e os dos workers (via checklist_poller) chegam
+        # pelo barramento. O último status enviado por fase/tarefa evita repetições.
+        checklist_poller.acquire(project_id, since)
+        last_message = time.monotonic()
+        try:
+            yield sse_message(snapshot)
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=SSE_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    event = None
+                if event is not None and sent.get(event_key(event)) != event["status"]:
+                    sent[event_key(event)] = event["status"]
+                    last_message = time.monotonic()
+                    yield sse_message(event)
+                if time.monotonic() - last_message >= SSE_KEEPALIVE_SECONDS:
+                    last_message = time.monotonic()
+                    yield ": keep-alive\n\n"
+        finally:
+            checklist_poller.release(project_id)
+            subscription.close()
+
+    return StreamingResponse(generate(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/agents/{agent_name}/stream")
+async def stream_agent(agent_name: str, body: AgentStreamRequest, current_user: User = Depends(get_current_user),
+                       db: AsyncSession = Depends(get_async_db)):
+    agent_type = STREAMING_AGENTS.get(agent_name)
+    if agent_type is None:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    await db.close()
+
+    async def generate():
+        # Cada token vai para o cliente assim que chega do provedor
+        try:
+            async with agent_pool.checkout(agent_type) as agent:
+                async for stage, text in agent.astream(body.input):
+                    yield sse_message({"type": "token", "stage": stage, "text": text})
+        except Exception as exc:
+            yield sse_message({"type": "error", "detail": str(exc)})
+            return
+        yield sse_message({"type": "done"})
+
+    return StreamingResponse(generate(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/jobs/{job_id}", response_model=Job)
+async def read_job(job_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    job = await db.get(DBJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    return registry.render_prometheus()
 
 @app.get("/")
 async def read_root():
     return FileResponse(str(static_dir / "index.html"))
 
 @app.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(DBUser).filter(DBUser.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(select(DBUser).where(DBUser.username == form_data.username))).scalars().first()
+    try:
+        # bcrypt roda no pool de hash para não travar o event loop durante o login
+        password_ok = user is not None and await password_hasher.verify(form_data.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent logins, try again",
+            headers={"Retry-After": "1"},
+        )
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -213,43 +572,53 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-@app.post("/projects", response_model=Project)
-async def create_project(project: ProjectCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db_project = DBProject(**project.dict(), created_at=datetime.now(), updated_at=datetime.now())
-    db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
-    return db_project
-
 @app.get("/projects", response_model=List[Project])
-async def read_projects(skip: int = 0, limit: int = 100, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    projects = db.query(DBProject).offset(skip).limit(limit).all()
+async def read_projects(response: Response, cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=500),
+                        status_filter: Optional[str] = Query(None, alias="status"), current_phase: Optional[int] = None,
+                        deadline_from: Optional[datetime] = None, deadline_to: Optional[datetime] = None,
+                        current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    query = filter_projects(select(DBProject), status_filter, current_phase, deadline_from, deadline_to)
+    query = query.order_by(DBProject.updated_at.desc(), DBProject.id.desc())
+    if cursor:
+        # Paginação por chave: continua depois do último (updated_at, id) visto,
+        # com o mesmo custo em qualquer página
+        try:
+            updated_at, last_id = decode_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(tuple_(DBProject.updated_at, DBProject.id) < tuple_(updated_at, last_id))
+
+    projects = (await db.execute(query.limit(limit + 1))).scalars().all()
+    if len(projects) > limit:
+        projects = projects[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(projects[-1].updated_at, projects[-1].id)
     return projects
 
 @app.get("/projects/{project_id}", response_model=Project)
-async def read_project(project_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    project = db.query(DBProject).filter(DBProject.id == project_id).first()
+async def read_project(project_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    project = await db.get(DBProject, project_id)
     if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
 
 @app.put("/projects/{project_id}", response_model=Project)
-async def update_project(project_id: int, project: ProjectCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db_project = db.query(DBProject).filter(DBProject.id == project_id).first()
+async def update_project(project_id: int, project: ProjectCreate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    db_project = await db.get(DBProject, project_id)
     if db_project is None:
         raise HTTPException(status_code=404, detail="Project not found")
     for key, value in project.dict().items():
         setattr(db_project, key, value)
     db_project.updated_at = datetime.now()
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
     return db_project
 
 @app.delete("/projects/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_project(project_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    project = db.query(DBProject).filter(DBProject.id == project_id).first()
+async def delete_project(project_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    project = await db.get(DBProject, project_id)
     if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    db.delete(project)
-    db.commit()
+    await db.delete(project)
+    await db.execute(job_queue.cancel_queued([project_job_key(project_id)]))
+    await db.commit()
+    artifact_store.delete(project_id)
     return {"status": "success", "message": "Project deleted successfully"}
\ No newline at end of file
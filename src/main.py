@@ -10,7 +10,7 @@ sys.path.append(str(root_dir))
 
 import uvicorn
 from src.interfaces.web_interface import app
-from src.utils.database import engine, Base
+from src.utils.database import engine, Base, create_missing_indexes
 
 def setup_logging():
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -27,7 +27,8 @@ def create_necessary_directories():
 
 def initialize_database():
     Base.metadata.create_all(bind=engine)
-    logging.info("Database tables created")
+    create_missing_indexes(engine)
+    logging.info("Database tables and indexes created")
 
 def load_initial_data():
     checklist_path = root_dir / "src" / "data" / "checklist.json"
@@ -49,7 +50,13 @@ def load_initial_data():
                 "Realizar entrevistas com stakeholders",
                 "Criar documentação de requisitos",
                 "Validar requisitos com o cliente"
-                ]
+                ],
+                # Dependências opcionais entre tarefas; sem esta chave a fase
+                # só começa depois que a anterior termina
+                "Dependencias": {
+                "Criar documentação de requisitos": ["Coletar requisitos detalhados", "Realizar entrevistas com stakeholders"],
+                "Validar requisitos com o cliente": ["Criar documentação de requisitos"]
+                }
             },
             "Fase 3: Design e Arquitetura": {
                 "Status": "Não Iniciado",
@@ -58,7 +65,12 @@ def load_initial_data():
                 "Criar design de interface do usuário",
                 "Definir estrutura de dados",
                 "Realizar revisões de design"
-                ]
+                ],
+                "Dependencias": {
+                "Criar design de interface do usuário": ["Desenvolver arquitetura do sistema"],
+                "Definir estrutura de dados": ["Desenvolver arquitetura do sistema"],
+                "Realizar revisões de design": ["Criar design de interface do usuário", "Definir estrutura de dados"]
+                }
             },
             "Fase 4: Desenvolvimento": {
                 "Status": "Não Iniciado",
@@ -67,7 +79,13 @@ def load_initial_data():
                 "Implementar funcionalidades core",
                 "Desenvolver interface do usuário",
                 "Realizar testes unitários"
-                ]
+                ],
+                # "Fase N/<tarefa>" referencia uma tarefa de outra fase
+                "Dependencias": {
+                "Implementar funcionalidades core": ["Configurar ambiente de desenvolvimento", "Fase 3/Definir estrutura de dados"],
+                "Desenvolver interface do usuário": ["Configurar ambiente de desenvolvimento", "Fase 3/Criar design de interface do usuário"],
+                "Realizar testes unitários": ["Implementar funcionalidades core", "Desenvolver interface do usuário"]
+                }
             },
             "Fase 5: Testes e Garantia de Qualidade": {
                 "Status": "Não Iniciado",
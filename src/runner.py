@@ -0,0 +1,145 @@
+import sys
+from pathlib import Path
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import traceback
+import uuid
+from dotenv import load_dotenv
+
+# Adicione o diretório raiz do projeto ao PYTHONPATH
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_dir))
+
+from src.utils.database import SessionLocal
+from src.utils import task_queue
+from src.agents.agent_manager import select_agent, task_input, task_project_inputs, load_project_inputs, input_hash
+from src.agents.agent_pool import agent_pool
+
+# Runner de tarefas do checklist: qualquer número de nós pode rodar
+#
+#   python src/runner.py --concurrency 8
+#
+# Cada runner pega tarefas prontas da tabela checklist_tasks (SKIP LOCKED no
+# Postgres, UPDATE condicional no SQLite), mantém o lease com heartbeat e
+# devolve à fila as tarefas de runners que pararam de responder.
+RUNNER_CONCURRENCY = int(os.getenv("RUNNER_CONCURRENCY", "4"))
+RUNNER_POLL_INTERVAL = float(os.getenv("RUNNER_POLL_INTERVAL", "1"))
+# Espera depois de uma falha do banco (ex.: "database is locked", conexão caída)
+RUNNER_ERROR_BACKOFF = float(os.getenv("RUNNER_ERROR_BACKOFF", "5"))
+RUNNER_FINISH_ATTEMPTS = int(os.getenv("RUNNER_FINISH_ATTEMPTS", "5"))
+
+logger = logging.getLogger("runner")
+
+class Runner:
+    def __init__(self, runner_id, concurrency=RUNNER_CONCURRENCY, poll_interval=RUNNER_POLL_INTERVAL):
+        self.runner_id = runner_id
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.held = set()
+
+    def _claim(self):
+        with SessionLocal() as db:
+            task = task_queue.claim_task(db, self.runner_id)
+            if task is None:
+                return None
+            project = task_project_inputs(task.phase, task.description, load_project_inputs(db, task.project_id))
+            input_data = task_input(task.description, task_queue.dependency_outputs(db, task.id), project)
+            return task.id, task.project_id, task.phase, task.description, input_data, (task.input_hash, task.output)
+
+    def _finish(self, task_id, output=None, error=None, digest=None):
+        with SessionLocal() as db:
+            if error is None:
+                if not task_queue.complete_task(db, task_id, self.runner_id, output, digest):
+                    logger.warning(f"Tarefa {task_id}: lease perdido, resultado descartado")
+            else:
+                task_queue.fail_task(db, task_id, self.runner_id, error)
+
+    async def run_task(self, task_id, project_id, phase, description, input_data, stored):
+        agent_type = select_agent(description)
+        digest = input_hash(agent_type, input_data)
+        # Entrada igual à da última execução: a saída que ficou na linha vale
+        if stored[0] == digest and stored[1] is not None:
+            logger.info(f"Tarefa {task_id} (projeto {project_id}, fase {phase}): {description} (reaproveitada)")
+            return stored[1], digest
+        async with agent_pool.checkout(agent_type, project_id) as agent:
+            logger.info(f"Tarefa {task_id} (projeto {project_id}, fase {phase}): {description} ({agent.name})")
+            output = await agent.aprocess(input_data)
+            await agent.aupdate_memory(f"Fase {phase}/{description}", output)
+        return output, digest
+
+    async def finish(self, task_id, output=None, error=None, digest=None):
+        # O resultado já foi pago: tenta gravar de novo (o heartbeat mantém o lease)
+        # em vez de perder a tarefa ou derrubar o runner
+        for attempt in range(RUNNER_FINISH_ATTEMPTS):
+            try:
+                return await asyncio.to_thread(self._finish, task_id, output, error, digest)
+            except Exception:
+                logger.exception(f"Tarefa {task_id}: falha ao gravar o resultado (tentativa {attempt + 1})")
+                await asyncio.sleep(RUNNER_ERROR_BACKOFF * 2 ** attempt)
+        logger.error(f"Tarefa {task_id}: resultado não gravado, volta à fila quando o lease expirar")
+
+    async def slot(self):
+        # Banco síncrono em threads para não travar o loop dos agentes
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self._claim)
+            except Exception:
+                logger.exception("Falha ao buscar tarefa na fila")
+                await asyncio.sleep(RUNNER_ERROR_BACKOFF)
+                continue
+            if claimed is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            task_id = claimed[0]
+            self.held.add(task_id)
+            try:
+                output, digest = await self.run_task(*claimed)
+            except Exception:
+                logger.exception(f"Tarefa {task_id} falhou")
+                await self.finish(task_id, error=traceback.format_exc())
+            else:
+                await self.finish(task_id, output, digest=digest)
+            finally:
+                self.held.discard(task_id)
+
+    def _heartbeat(self):
+        with SessionLocal() as db:
+            task_queue.heartbeat(db, list(self.held), self.runner_id)
+            requeued = task_queue.requeue_stale(db)
+            if requeued:
+                logger.warning(f"{requeued} tarefa(s) reenfileirada(s) por lease expirado")
+
+    async def keep_alive(self):
+        while True:
+            try:
+                await asyncio.to_thread(self._heartbeat)
+            except Exception:
+                # Sem heartbeat agora; o próximo (antes do lease expirar) tenta de novo
+                logger.exception("Falha no heartbeat")
+                await asyncio.sleep(min(RUNNER_ERROR_BACKOFF, task_queue.TASK_LEASE_TIMEOUT / 3))
+                continue
+            await asyncio.sleep(task_queue.TASK_LEASE_TIMEOUT / 3)
+
+    async def run(self):
+        logger.info(f"Runner {self.runner_id} iniciado com {self.concurrency} slot(s)")
+        await agent_pool.warm_up()
+        await asyncio.gather(self.keep_alive(), *(self.slot() for _ in range(self.concurrency)))
+
+if __name__ == "__main__":
+    # Carregar variáveis de ambiente
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Runner distribuído de tarefas do checklist")
+    parser.add_argument("--concurrency", type=int, default=RUNNER_CONCURRENCY)
+    parser.add_argument("--poll-interval", type=float, default=RUNNER_POLL_INTERVAL)
+    parser.add_argument("--id", default=f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(Runner(args.id, args.concurrency, args.poll_interval).run())
+    except KeyboardInterrupt:
+        pass
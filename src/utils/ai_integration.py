@@ -1,8 +1,50 @@
+import asyncio
 import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import aiohttp
 import openai
 from src.utils.database import DBProject
+from src.utils.artifact_store import artifact_store
+from src.utils.llm_cache import response_cache, make_cache_key
+from src.utils.llm_batcher import MicroBatcher
+from src.utils.metrics import registry
+from src.utils.rate_limit import (AdaptiveConcurrency, LLM_MIN_CONCURRENCY, estimate_tokens,
+                                  rate_limiter as default_rate_limiter)
+
+logger = logging.getLogger(__name__)
+
+# Configuração do cliente LLM (variáveis de ambiente)
+LLM_API_BASE = os.getenv("LLM_API_BASE", "https://api.openai.com/v1")
+LLM_API_KEY = os.getenv("OPENAI_API_KEY")
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_KEEPALIVE_TIMEOUT = float(os.getenv("LLM_KEEPALIVE_TIMEOUT", "30"))
+# Micro-batching: prompts que chegam dentro da janela vão numa única chamada ao
+# endpoint de completions com lista de prompts. Desligado com tamanho 1, pois
+# /chat/completions não aceita lotes.
+LLM_BATCH_MAX_SIZE = int(os.getenv("LLM_BATCH_MAX_SIZE", "1"))
+LLM_BATCH_MAX_WAIT = float(os.getenv("LLM_BATCH_MAX_WAIT", "0.01"))
+LLM_BATCH_PATH = os.getenv("LLM_BATCH_PATH", "/completions")
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+# Respostas do endpoint de lote que indicam que o provedor não o suporta
+BATCH_UNSUPPORTED_STATUSES = {400, 404, 405, 501}
 
-def process_project_with_gpt(project: DBProject):
+singleflight_shared = registry.counter("llm_singleflight_shared_total",
+                                       "Chamadas atendidas por uma requisição idêntica já em voo")
+
+def process_project_with_gpt(project: DBProject, persist: bool = False):
     # Simular processamento com GPT-4
     project_json = {
     "Nome do Projeto": "{nome do projeto}",
@@ -45,12 +87,276 @@ def process_project_with_gpt(project: DBProject):
     ]
   }
 
-    # Salvar em projeto.json
-    with open('src/data/projeto.json', 'w') as f:
-        json.dump(project_json, f, indent=2)
+    # O worker entrega o projeto.json ao AgentManager em memória; com persist, também
+    # vai para o disco (para quem o lê em outro processo)
+    artifact_store.put(project.id, "projeto", project_json, persist=persist)
+    return project_json
+
+class LLMClient:
+    # Cliente assíncrono com sessão HTTP keep-alive compartilhada.
+    # Uma instância pertence a um único event loop (a sessão aiohttp não pode
+    # ser usada entre loops); use get_llm_client() para obter a do loop atual.
+    def __init__(self, api_base: str = LLM_API_BASE, api_key: Optional[str] = LLM_API_KEY,
+                 model: str = LLM_MODEL, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 timeout: float = LLM_TIMEOUT, max_retries: int = LLM_MAX_RETRIES,
+                 keepalive_timeout: float = LLM_KEEPALIVE_TIMEOUT, backoff: float = 0.5,
+                 batch_max_size: int = LLM_BATCH_MAX_SIZE, batch_max_wait: float = LLM_BATCH_MAX_WAIT,
+                 batch_path: str = LLM_BATCH_PATH, rate_limiter=default_rate_limiter,
+                 min_concurrency: int = LLM_MIN_CONCURRENCY):
+        self.api_base = api_base.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.keepalive_timeout = keepalive_timeout
+        self.backoff = backoff
+        # Limite de chamadas simultâneas que se ajusta aos 429 e à latência do provedor
+        self._concurrency = AdaptiveConcurrency(max_concurrency, min_concurrency)
+        self.rate_limiter = rate_limiter
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.batch_path = batch_path
+        self._batcher = MicroBatcher(self._send_batch, batch_max_size, batch_max_wait) if batch_max_size > 1 else None
+        self._inflight = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                             keepalive_timeout=self.keepalive_timeout)
+            headers = {"Authorization": f"Bearer {self.api_key}"}
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout),
+                                                  headers=headers)
+        return self._session
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # Backoff exponencial com jitter para não sincronizar as retentativas
+        return self.backoff * (2 ** attempt) * (0.5 + random.random())
+
+    async def _post(self, path: str, payload: dict) -> dict:
+        session = self._get_session()
+        url = f"{self.api_base}{path}"
+        estimated = estimate_tokens(payload)
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(estimated)
+            delay = None
+            try:
+                async with self._concurrency:
+                    start = time.perf_counter()
+                    async with session.post(url, json=payload) as response:
+                        if response.status == 429:
+                            self._concurrency.on_overload()
+                        if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                            delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+                        else:
+                            if response.status >= 400:
+                                # Erro definitivo: a reserva de tokens não pode ficar debitada
+                                await self.rate_limiter.settle(estimated, 0)
+                            response.raise_for_status()
+                            data = await response.json()
+                            self._concurrency.on_success(time.perf_counter() - start)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.max_retries:
+                    await self.rate_limiter.settle(estimated, 0)
+                    raise
+                delay = self._retry_delay(attempt)
+            if delay is None:
+                await self.rate_limiter.settle(estimated, (data.get("usage") or {}).get("total_tokens"))
+                return data
+            # Tentativa recusada não consome a cota de tokens; esperar fora do slot de concorrência
+            await self.rate_limiter.settle(estimated, 0)
+            await asyncio.sleep(delay)
+
+    async def complete(self, prompt: str, model: Optional[str] = None, **params) -> str:
+        if not self.api_key:
+            # Sem chave configurada: manter a resposta simulada
+            return f"Resposta simulada da IA para: {prompt}"
+        model = model or self.model
+        # Single-flight: prompts idênticos em voo compartilham a mesma requisição.
+        # A chamada roda numa task própria para que cancelar quem a iniciou não
+        # derrube os demais que esperam por ela.
+        key = make_cache_key(model, prompt, params)
+        task = self._inflight.get(key)
+        if task is not None:
+            singleflight_shared.inc()
+        else:
+            task = asyncio.ensure_future(self._complete(prompt, model, params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _complete(self, prompt: str, model: str, params: dict) -> str:
+        if self._batcher is not None:
+            return await self._batcher.submit((model, json.dumps(params, sort_keys=True, default=str)), prompt)
+        return await self._chat(prompt, model, params)
+
+    async def _chat(self, prompt: str, model: str, params: dict) -> str:
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            **params,
+        }
+        data = await self._post("/chat/completions", payload)
+        return data["choices"][0]["message"]["content"]
+
+    async def _send_batch(self, group, prompts):
+        model, params = group[0], json.loads(group[1])
+        if len(prompts) == 1 or self._batcher is None:
+            return await asyncio.gather(*(self._chat(prompt, model, params) for prompt in prompts))
+        try:
+            data = await self._post(self.batch_path, {"model": model, "prompt": prompts, **params})
+        except aiohttp.ClientResponseError as exc:
+            if exc.status not in BATCH_UNSUPPORTED_STATUSES:
+                raise
+            # Provedor sem endpoint de lote: desligar o batching deste cliente
+            logger.warning(f"Batching de LLM desativado: {self.batch_path} respondeu {exc.status}")
+            self._batcher = None
+            return await asyncio.gather(*(self._chat(prompt, model, params) for prompt in prompts))
+        texts = [None] * len(prompts)
+        for choice in data["choices"]:
+            texts[choice["index"]] = choice["text"]
+        return texts
+
+    @asynccontextmanager
+    async def _open_stream(self, session: aiohttp.ClientSession, url: str, payload: dict):
+        # Só dá para retentar antes do primeiro byte; depois disso o cliente já recebeu tokens.
+        # O slot de concorrência vale por tentativa e, na que deu certo, até o fim do stream.
+        estimated = estimate_tokens(payload)
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(estimated)
+            delay = None
+            async with self._concurrency:
+                start = time.perf_counter()
+                try:
+                    # O timeout total não cabe em respostas longas: limitar o tempo entre leituras
+                    response = await session.post(url, json=payload,
+                                                  timeout=aiohttp.ClientTimeout(total=None, sock_read=self.timeout))
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                    if attempt >= self.max_retries:
+                        await self.rate_limiter.settle(estimated, 0)
+                        raise
+                    delay = self._retry_delay(attempt)
+                else:
+                    if response.status == 429:
+                        self._concurrency.on_overload()
+                    if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                        response.release()
+                        delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+                    else:
+                        if response.status >= 400:
+                            await self.rate_limiter.settle(estimated, 0)
+                        else:
+                            self._concurrency.on_success(time.perf_counter() - start)
+                        try:
+                            yield response
+                        finally:
+                            response.release()
+                        return
+            # Tentativa recusada não consome a cota de tokens; esperar fora do slot de concorrência
+            await self.rate_limiter.settle(estimated, 0)
+            await asyncio.sleep(delay)
+
+    async def stream(self, prompt: str, model: Optional[str] = None, **params) -> AsyncIterator[str]:
+        if not self.api_key:
+            # Mesma resposta simulada de complete(), entregue palavra a palavra
+            for token in re.findall(r"\S+\s*", f"Resposta simulada da IA para: {prompt}"):
+                yield token
+            return
+        payload = {
+            "model": model or self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            **params,
+            "stream": True,
+        }
+        session = self._get_session()
+        async with self._open_stream(session, f"{self.api_base}/chat/completions", payload) as response:
+            response.raise_for_status()
+            # Server-sent events: uma linha "data: {json}" por pedaço, terminando em "data: [DONE]"
+            async for line in response.content:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                token = (choices[0].get("delta") or {}).get("content")
+                if token:
+                    yield token
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+_clients = weakref.WeakKeyDictionary()
+
+def get_llm_client() -> LLMClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = LLMClient()
+        _clients[loop] = client
+    return client
+
+async def aget_ai_response(prompt: str, model: Optional[str] = None, use_cache: bool = True, **params) -> str:
+    client = get_llm_client()
+    if response_cache is None or not use_cache:
+        return await client.complete(prompt, model=model, **params)
+
+    # Os prompts dos agentes são determinísticos: mesma (modelo, prompt, parâmetros)
+    # devolve a resposta já paga em vez de chamar o provedor de novo
+    model = model or client.model
+    key = make_cache_key(model, prompt, params)
+    response = await response_cache.aget(key)
+    if response is None:
+        response = await client.complete(prompt, model=model, **params)
+        await response_cache.aset(key, model, response)
+    return response
+
+async def aget_ai_response_stream(prompt: str, model: Optional[str] = None, use_cache: bool = True,
+                                  **params) -> AsyncIterator[str]:
+    client = get_llm_client()
+    if response_cache is None or not use_cache:
+        async for token in client.stream(prompt, model=model, **params):
+            yield token
+        return
+
+    model = model or client.model
+    key = make_cache_key(model, prompt, params)
+    response = await response_cache.aget(key)
+    if response is not None:
+        yield response
+        return
+    parts = []
+    async for token in client.stream(prompt, model=model, **params):
+        parts.append(token)
+        yield token
+    # Só chega aqui se a resposta veio inteira (cliente não desconectou)
+    await response_cache.aset(key, model, "".join(parts))
+
+# Loop dedicado para os chamadores síncronos: mantém a sessão (e as conexões
+# keep-alive) viva entre chamadas em vez de criar um loop novo a cada uma.
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="llm-client-loop", daemon=True).start()
+    return _sync_loop
+
+def run_sync(coro):
+    # Executa uma corrotina no loop compartilhado e bloqueia até o resultado
+    return asyncio.run_coroutine_threadsafe(coro, _get_sync_loop()).result()
 
-def get_ai_response(prompt: str) -> str:
-    # Simular uma resposta da IA
-    return f"Resposta simulada da IA para: {prompt}"
+def get_ai_response(prompt: str, model: Optional[str] = None, use_cache: bool = True, **params) -> str:
+    return run_sync(aget_ai_response(prompt, model=model, use_cache=use_cache, **params))
 
-# Adicione outras funções de integração com IA conforme necessário
\ No newline at end of file
+# Adicione outras funções de integração com IA conforme necessário
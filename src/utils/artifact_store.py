@@ -0,0 +1,59 @@
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from src.utils.cache import LRUCache
+
+ARTIFACTS_DIR = Path(os.getenv("ARTIFACTS_DIR", Path(__file__).resolve().parent.parent / "data" / "projects"))
+
+class ArtifactStore:
+    # Artefatos por projeto (ex.: projeto.json) em src/data/projects/<id>/.
+    # Quem produz e consome no mesmo processo recebe o objeto direto da
+    # memória; o arquivo é o fallback para outros processos e reinícios.
+    def __init__(self, base_dir: Path = ARTIFACTS_DIR, memory_size: int = 256):
+        self.base_dir = Path(base_dir)
+        self._memory = LRUCache(maxsize=memory_size)
+
+    def path(self, project_id: int, name: str) -> Path:
+        return self.base_dir / str(project_id) / f"{name}.json"
+
+    def put(self, project_id: int, name: str, data, persist: bool = True):
+        self._memory.set((project_id, name), data)
+        if persist:
+            self._write_atomic(self.path(project_id, name), data)
+
+    def get(self, project_id: int, name: str):
+        data = self._memory.get((project_id, name))
+        if data is None:
+            path = self.path(project_id, name)
+            if not path.exists():
+                return None
+            with open(path, 'r') as f:
+                data = json.load(f)
+            self._memory.set((project_id, name), data)
+        return data
+
+    def delete(self, project_id: int):
+        for key in [key for key in self._memory.keys() if key[0] == project_id]:
+            self._memory.pop(key)
+        shutil.rmtree(self.base_dir / str(project_id), ignore_errors=True)
+
+    def _write_atomic(self, path: Path, data):
+        # Escreve em arquivo temporário no mesmo diretório e troca com os.replace,
+        # assim um leitor nunca vê o JSON pela metade
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+artifact_store = ArtifactStore()
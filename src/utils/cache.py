@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+class LRUCache:
+    # Cache LRU em memória, thread-safe, com TTL opcional por entrada. Com
+    # `max_bytes`, o tamanho de cada valor (medido por `sizeof`) também limita o
+    # cache; `on_evict(key, value)` é chamado para entradas removidas por
+    # capacidade ou expiração, fora do lock.
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, max_bytes: Optional[int] = None,
+                 sizeof: Optional[Callable[[Any], int]] = None,
+                 on_evict: Optional[Callable[[Hashable, Any], None]] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.on_evict = on_evict
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _notify(self, evicted):
+        if self.on_evict is not None:
+            for key, value in evicted:
+                self.on_evict(key, value)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        evicted = []
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at, size = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.bytes -= size
+                evicted.append((key, value))
+            self.misses += 1
+        self._notify(evicted)
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        size = self.sizeof(value)
+        evicted = []
+        with self._lock:
+            previous = self._data.pop(key, _MISSING)
+            if previous is not _MISSING:
+                self.bytes -= previous[2]
+            self._data[key] = (value, expires_at, size)
+            self.bytes += size
+            # A entrada recém-gravada fica mesmo que sozinha passe de max_bytes
+            while len(self._data) > self.maxsize or (self.max_bytes is not None and self.bytes > self.max_bytes
+                                                     and len(self._data) > 1):
+                old_key, (old_value, _, old_size) = self._data.popitem(last=False)
+                self.bytes -= old_size
+                self.evictions += 1
+                evicted.append((old_key, old_value))
+        self._notify(evicted)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            self.bytes -= entry[2]
+            return entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def keys(self):
+        # Cópia das chaves (inclusive expiradas), segura para iterar enquanto outras threads gravam
+        with self._lock:
+            return list(self._data)
+
+    def items(self):
+        # Entradas não expiradas, da menos para a mais recentemente usada
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (value, expires_at, _) in self._data.items()
+                    if expires_at is None or expires_at > now]
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
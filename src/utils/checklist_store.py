@@ -0,0 +1,121 @@
+import copy
+import json
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import Session
+from src.utils.database import DBChecklistPhase, DBChecklistTask
+
+CHECKLIST_TEMPLATE_PATH = Path(__file__).resolve().parent.parent / "data" / "checklist.json"
+
+STATUS_NOT_STARTED = "Não Iniciado"
+STATUS_IN_PROGRESS = "Em Andamento"
+STATUS_DONE = "Concluído"
+# Usados pela execução distribuída (src/utils/task_queue.py)
+STATUS_QUEUED = "Na Fila"
+STATUS_FAILED = "Falhou"
+
+_template = None
+
+def load_template():
+    # checklist.json é só o modelo inicial; o estado de cada projeto fica no banco
+    global _template
+    if _template is None:
+        with open(CHECKLIST_TEMPLATE_PATH, 'r') as f:
+            _template = json.load(f)
+    return copy.deepcopy(_template)
+
+def create_checklist(db: Session, project_id: int, template=None, commit: bool = True):
+    exists = db.execute(select(DBChecklistPhase.id).where(DBChecklistPhase.project_id == project_id)
+                        .limit(1)).first()
+    if exists:
+        return
+    template = template or load_template()
+    now = datetime.now()
+    for phase, (name, fase) in enumerate(template.items(), start=1):
+        db.add(DBChecklistPhase(project_id=project_id, phase=phase, name=name,
+                                status=fase.get("Status", STATUS_NOT_STARTED),
+                                dependencies=json.dumps(fase["Dependencias"]) if "Dependencias" in fase else None,
+                                updated_at=now))
+        db.add_all([DBChecklistTask(project_id=project_id, phase=phase, position=position, description=tarefa,
+                                    status=STATUS_NOT_STARTED, updated_at=now)
+                    for position, tarefa in enumerate(fase["Tarefas"])])
+    # Sessões sem autoflush: as linhas precisam chegar ao banco antes de UPDATEs na mesma transação
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+
+def add_tasks(db: Session, project_id: int, phase: int, descriptions):
+    existing = set(db.execute(select(DBChecklistTask.description)
+                              .where(DBChecklistTask.project_id == project_id, DBChecklistTask.phase == phase))
+                   .scalars())
+    position = db.execute(select(func.count(DBChecklistTask.id))
+                          .where(DBChecklistTask.project_id == project_id, DBChecklistTask.phase == phase)).scalar()
+    now = datetime.now()
+    for description in descriptions:
+        if description in existing:
+            continue
+        db.add(DBChecklistTask(project_id=project_id, phase=phase, position=position, description=description,
+                               status=STATUS_NOT_STARTED, updated_at=now))
+        position += 1
+    db.commit()
+
+def load_checklist(db: Session, project_id: int):
+    # Reconstrói o checklist no formato do checklist.json, mais o id da linha
+    # de cada tarefa indexado por (fase, descrição)
+    phases = db.execute(select(DBChecklistPhase).where(DBChecklistPhase.project_id == project_id)
+                        .order_by(DBChecklistPhase.phase)).scalars().all()
+    tasks = db.execute(select(DBChecklistTask).where(DBChecklistTask.project_id == project_id)
+                       .order_by(DBChecklistTask.phase, DBChecklistTask.position)).scalars().all()
+    checklist = {}
+    by_phase = {}
+    for fase in phases:
+        checklist[fase.name] = {"Status": fase.status, "Tarefas": []}
+        if fase.dependencies:
+            checklist[fase.name]["Dependencias"] = json.loads(fase.dependencies)
+        by_phase[fase.phase] = checklist[fase.name]
+    task_ids = {}
+    for task in tasks:
+        by_phase[task.phase]["Tarefas"].append(task.description)
+        task_ids[(task.phase, task.description)] = task.id
+    return checklist, task_ids
+
+def set_task_status(db: Session, task_id: int, status: str, output: str = None, input_hash: str = None):
+    # Com `output`, a linha vira o checkpoint da tarefa (ver load_outputs)
+    values = {"status": status, "updated_at": datetime.now()}
+    if output is not None:
+        values["output"] = output
+        values["input_hash"] = input_hash
+    db.execute(update(DBChecklistTask).where(DBChecklistTask.id == task_id).values(**values))
+    db.commit()
+
+def load_outputs(db: Session, project_id: int, phases):
+    # Saída e hash da entrada de cada tarefa concluída, indexados por (fase, descrição)
+    rows = db.execute(select(DBChecklistTask.phase, DBChecklistTask.description,
+                             DBChecklistTask.input_hash, DBChecklistTask.output)
+                      .where(DBChecklistTask.project_id == project_id, DBChecklistTask.phase.in_(phases),
+                             DBChecklistTask.status == STATUS_DONE, DBChecklistTask.output.isnot(None))).all()
+    return {(phase, description): (input_hash, output) for phase, description, input_hash, output in rows}
+
+def set_phase_feedback(db: Session, project_id: int, phase: int, feedback: str, commit: bool = True):
+    # Feedback pode chegar antes do primeiro processamento: cria o checklist se preciso.
+    # UPDATE da linha da fase: sem ler-modificar-gravar, dois processos não se sobrescrevem
+    create_checklist(db, project_id, commit=False)
+    db.execute(update(DBChecklistPhase)
+               .where(DBChecklistPhase.project_id == project_id, DBChecklistPhase.phase == phase)
+               .values(feedback=feedback, updated_at=datetime.now()))
+    if commit:
+        db.commit()
+
+def load_feedback(db: Session, project_id: int):
+    rows = db.execute(select(DBChecklistPhase.phase, DBChecklistPhase.feedback)
+                      .where(DBChecklistPhase.project_id == project_id, DBChecklistPhase.feedback.isnot(None))).all()
+    return dict(rows)
+
+def set_phase_status(db: Session, project_id: int, phase: int, status: str):
+    db.execute(update(DBChecklistPhase)
+               .where(DBChecklistPhase.project_id == project_id, DBChecklistPhase.phase == phase)
+               .values(status=status, updated_at=datetime.now()))
+    db.commit()
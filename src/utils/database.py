@@ -1,10 +1,13 @@
 # src/utils/database.py
 
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Boolean
+from sqlalchemy import create_engine, event, Column, Integer, String, DateTime, Text, Boolean, Float, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 import os
 from dotenv import load_dotenv
+from src.utils.db_pool import pool_options, instrument_engine
 
 load_dotenv()  # Carrega as variáveis de ambiente do arquivo .env
 
@@ -13,8 +16,38 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL não está definida")
 
-engine = create_engine(DATABASE_URL)
+# Drivers assíncronos usados pelas rotas da API
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+def make_async_url(url: str) -> str:
+    url = make_url(url)
+    drivername = ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or make_async_url(DATABASE_URL)
+
+def enable_sqlite_foreign_keys(engine):
+    # SQLite só aplica as FKs (e o ON DELETE CASCADE das tabelas de projeto) com
+    # este pragma, que vale por conexão
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL, "sync"))
+instrument_engine(engine, "sync")
+enable_sqlite_foreign_keys(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL, "async", is_async=True))
+instrument_engine(async_engine.sync_engine, "async")
+enable_sqlite_foreign_keys(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 class DBUser(Base):
@@ -28,6 +61,13 @@ class DBUser(Base):
 
 class DBProject(Base):
     __tablename__ = "projects"
+    # Índices da listagem: ordenação (updated_at, id) e filtros de GET /projects
+    __table_args__ = (
+        Index("ix_projects_updated_at_id", "updated_at", "id"),
+        Index("ix_projects_status_updated_at_id", "status", "updated_at", "id"),
+        Index("ix_projects_current_phase_updated_at_id", "current_phase", "updated_at", "id"),
+        Index("ix_projects_deadline", "deadline"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -38,6 +78,105 @@ class DBProject(Base):
     created_at = Column(DateTime)
     updated_at = Column(DateTime)
 
+class DBChecklistPhase(Base):
+    __tablename__ = "checklist_phases"
+    __table_args__ = (UniqueConstraint("project_id", "phase"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), index=True)
+    phase = Column(Integer)
+    name = Column(String)
+    status = Column(String)
+    dependencies = Column(Text)  # JSON do mapa "Dependencias" da fase
+    feedback = Column(Text)  # último feedback recebido sobre a fase (entrada das tarefas dela)
+    updated_at = Column(DateTime)
+
+class DBChecklistTask(Base):
+    __tablename__ = "checklist_tasks"
+    __table_args__ = (
+        Index("ix_checklist_tasks_project_phase", "project_id", "phase"),
+        Index("ix_checklist_tasks_status_queued_at", "status", "queued_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"))
+    phase = Column(Integer)
+    position = Column(Integer)
+    description = Column(Text)
+    status = Column(String)
+    updated_at = Column(DateTime)
+    # Execução distribuída (src/runner.py): lease do runner e saída da tarefa
+    output = Column(Text)
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text)
+    locked_by = Column(String)
+    locked_at = Column(DateTime)
+    queued_at = Column(DateTime)
+    # Hash da entrada que gerou `output`: se não mudou, a saída é reaproveitada
+    input_hash = Column(String(64))
+
+class DBChecklistTaskDependency(Base):
+    __tablename__ = "checklist_task_dependencies"
+
+    task_id = Column(Integer, ForeignKey("checklist_tasks.id", ondelete="CASCADE"), primary_key=True)
+    depends_on_id = Column(Integer, ForeignKey("checklist_tasks.id", ondelete="CASCADE"), primary_key=True,
+                           index=True)
+
+class DBJob(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_run_after", "status", "run_after"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, index=True)
+    payload = Column(Text)
+    status = Column(String)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    last_error = Column(Text)
+    locked_by = Column(String)
+    locked_at = Column(DateTime)
+    run_after = Column(DateTime)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    # Jobs com a mesma chave rodam um de cada vez, na ordem de criação (ex.: "project:42")
+    serial_key = Column(String, index=True)
+
+class DBLLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+
+    key = Column(String(64), primary_key=True)
+    model = Column(String)
+    response = Column(Text)
+    created_at = Column(DateTime)
+    expires_at = Column(DateTime, index=True)
+    last_accessed_at = Column(DateTime, index=True)
+
+class DBAgentMemory(Base):
+    __tablename__ = "agent_memory"
+    __table_args__ = (
+        UniqueConstraint("agent", "project_id", "key"),
+        Index("ix_agent_memory_agent_project_updated_at", "agent", "project_id", "updated_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    agent = Column(String)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"))
+    key = Column(String)
+    value = Column(Text)  # JSON
+    updated_at = Column(DateTime)
+
+class DBRateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    name = Column(String, primary_key=True)
+    tokens = Column(Float)
+    updated_at = Column(Float)  # epoch em segundos, comum a todos os processos
+
+def supports_skip_locked(bind) -> bool:
+    # SQLite não tem SELECT ... FOR UPDATE SKIP LOCKED
+    return bind.dialect.name in ("postgresql", "mysql", "oracle")
+
 def get_db():
     db = SessionLocal()
     try:
@@ -45,5 +184,17 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def create_missing_indexes(bind=engine):
+    # create_all pula tabelas que já existem: índices declarados depois que a
+    # tabela foi criada (ex.: os da listagem de projects) são criados aqui
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
 # Cria todas as tabelas no banco de dados
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+Base.metadata.create_all(bind=engine)
+create_missing_indexes()
\ No newline at end of file
@@ -0,0 +1,84 @@
+import os
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from src.utils.metrics import registry
+
+# Dimensionamento do pool por variáveis de ambiente (por processo/worker)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class _WaitTimingMixin:
+    # _do_get é onde o QueuePool espera por uma conexão livre (ou abre overflow);
+    # não há evento público para esse tempo de espera
+    metrics_name = "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            registry.histogram("db_pool_checkout_wait_seconds", "Tempo de espera por conexão do pool",
+                               {"engine": self.metrics_name}, WAIT_BUCKETS).observe(time.perf_counter() - start)
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+def pool_options(url: str, name: str, is_async: bool = False) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if make_url(url).get_backend_name() == "sqlite":
+        # SQLite escolhe o próprio pool (ex.: :memory: precisa de conexão única)
+        return options
+    pool_class = InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool
+    options.update(
+        poolclass=type(f"{pool_class.__name__}_{name}", (pool_class,), {"metrics_name": name}),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+def instrument_engine(engine, name: str):
+    labels = {"engine": name}
+    checked_out = registry.gauge("db_pool_checked_out", "Conexões em uso", labels)
+    opened = registry.counter("db_pool_connections_opened_total", "Conexões abertas no banco", labels)
+    closed = registry.counter("db_pool_connections_closed_total", "Conexões fechadas", labels)
+    invalidated = registry.counter("db_pool_connections_invalidated_total", "Conexões invalidadas", labels)
+    checkouts = registry.counter("db_pool_checkouts_total", "Checkouts do pool", labels)
+    pool = engine.pool
+    registry.gauge("db_pool_size", "Tamanho configurado do pool", labels,
+                   fn=lambda: pool.size() if hasattr(pool, "size") else 0)
+    registry.gauge("db_pool_overflow", "Conexões de overflow abertas", labels,
+                   fn=lambda: max(pool.overflow(), 0) if hasattr(pool, "overflow") else 0)
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        opened.inc()
+
+    @event.listens_for(engine, "close")
+    def on_close(dbapi_connection, connection_record):
+        closed.inc()
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        invalidated.inc()
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.inc()
+        checked_out.inc()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out.dec()
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import threading
+from collections import defaultdict
+
+from src.utils.metrics import registry
+
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+
+published = registry.counter("events_published_total", "Eventos publicados no barramento")
+dropped = registry.counter("events_dropped_total", "Eventos descartados por assinantes lentos")
+
+class Subscription:
+    # Fila limitada de um assinante. Se o cliente não acompanha, os eventos mais
+    # antigos são descartados (o produtor nunca bloqueia) e a contagem de
+    # descartes vai no próximo evento entregue.
+    def __init__(self, bus, topic, maxsize):
+        self.bus = bus
+        self.topic = topic
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def _put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            dropped.inc()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        event = await self.queue.get()
+        if self.dropped:
+            event = {**event, "dropped": self.dropped}
+            self.dropped = 0
+        return event
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+class EventBus:
+    # Pub/sub em processo; publish pode ser chamado de qualquer thread/loop
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        registry.gauge("events_subscribers", "Assinantes conectados",
+                       fn=lambda: sum(len(subs) for subs in self._subscribers.values()))
+
+    def subscribe(self, topic) -> Subscription:
+        subscription = Subscription(self, topic, self.queue_size)
+        with self._lock:
+            self._subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.topic]
+
+    def publish(self, topic, event: dict):
+        published.inc()
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        for subscription in subscribers:
+            if subscription.loop is current_loop:
+                subscription._put(event)
+            elif not subscription.loop.is_closed():
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+
+def project_topic(project_id: int) -> str:
+    return f"project:{project_id}"
+
+event_bus = EventBus()
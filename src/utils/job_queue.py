@@ -0,0 +1,126 @@
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update, delete, exists
+from sqlalchemy.orm import Session, aliased
+from src.utils.database import DBJob, supports_skip_locked
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "10"))
+JOB_LEASE_TIMEOUT = float(os.getenv("JOB_LEASE_TIMEOUT", "900"))
+
+# Funções que processam cada tipo de job, registradas com @register_handler
+HANDLERS = {}
+
+def register_handler(kind: str):
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+def new_job(kind: str, payload: dict, max_attempts: int = JOB_MAX_ATTEMPTS, serial_key: str = None) -> DBJob:
+    # Job ainda fora de sessão, para entrar na transação de quem o cria (sync ou async)
+    now = datetime.now()
+    return DBJob(kind=kind, payload=json.dumps(payload), status=JOB_QUEUED, attempts=0, max_attempts=max_attempts,
+                 run_after=now, created_at=now, updated_at=now, serial_key=serial_key)
+
+def enqueue(db: Session, kind: str, payload: dict, max_attempts: int = JOB_MAX_ATTEMPTS, commit: bool = True,
+            serial_key: str = None) -> DBJob:
+    job = new_job(kind, payload, max_attempts, serial_key)
+    db.add(job)
+    if commit:
+        db.commit()
+        db.refresh(job)
+    return job
+
+def cancel_queued(serial_keys):
+    # DELETE dos jobs ainda na fila dessas chaves, para a transação de quem apaga o projeto (sync ou async).
+    # O que já está rodando segue até o fim; o handler não acha mais o projeto
+    return delete(DBJob).where(DBJob.serial_key.in_(serial_keys), DBJob.status == JOB_QUEUED)
+
+def claim_job(db: Session, worker_id: str, kinds=None) -> Optional[DBJob]:
+    now = datetime.now()
+    # Job anterior com a mesma serial_key ainda pendente (na fila, esperando backoff ou rodando): este espera
+    earlier = aliased(DBJob)
+    blocked = exists().where(earlier.serial_key == DBJob.serial_key, earlier.id < DBJob.id,
+                             earlier.status.in_((JOB_QUEUED, JOB_RUNNING)))
+    query = (select(DBJob).where(DBJob.status == JOB_QUEUED, DBJob.run_after <= now, ~blocked)
+             .order_by(DBJob.id).limit(1))
+    if kinds:
+        query = query.where(DBJob.kind.in_(kinds))
+
+    if supports_skip_locked(db.get_bind()):
+        # Cada worker pega uma linha diferente sem esperar os locks dos outros
+        job = db.execute(query.with_for_update(skip_locked=True, of=DBJob)).scalars().first()
+        if job is None:
+            db.rollback()
+            return None
+    else:
+        # Fallback (SQLite): UPDATE condicional; quem perder a corrida tenta de novo depois
+        job = db.execute(query).scalars().first()
+        if job is None:
+            return None
+        claimed = db.execute(update(DBJob).where(DBJob.id == job.id, DBJob.status == JOB_QUEUED)
+                             .values(status=JOB_RUNNING, locked_by=worker_id, locked_at=now))
+        if claimed.rowcount != 1:
+            db.rollback()
+            return None
+        db.refresh(job)
+
+    job.status = JOB_RUNNING
+    job.locked_by = worker_id
+    job.locked_at = now
+    job.attempts = (job.attempts or 0) + 1
+    job.updated_at = now
+    db.commit()
+    return job
+
+def heartbeat(db: Session, job_id: int, worker_id: str):
+    db.execute(update(DBJob).where(DBJob.id == job_id, DBJob.locked_by == worker_id)
+               .values(locked_at=datetime.now()))
+    db.commit()
+
+def complete_job(db: Session, job_id: int, worker_id: str) -> bool:
+    # Só conclui se o lease ainda é deste worker; se expirou, outro já refaz o job
+    now = datetime.now()
+    done = db.execute(update(DBJob).where(DBJob.id == job_id, DBJob.locked_by == worker_id, DBJob.status == JOB_RUNNING)
+                      .values(status=JOB_SUCCEEDED, locked_by=None, updated_at=now, finished_at=now))
+    db.commit()
+    return done.rowcount == 1
+
+def fail_job(db: Session, job_id: int, worker_id: str, error: str):
+    job = db.get(DBJob, job_id)
+    if job is None or job.locked_by != worker_id:
+        return
+    now = datetime.now()
+    job.last_error = error
+    job.locked_by = None
+    job.updated_at = now
+    if job.attempts < job.max_attempts:
+        # Nova tentativa com backoff exponencial
+        job.status = JOB_QUEUED
+        job.run_after = now + timedelta(seconds=JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1))
+    else:
+        job.status = JOB_FAILED
+        job.finished_at = now
+    db.commit()
+
+def requeue_stale(db: Session, lease_timeout: float = JOB_LEASE_TIMEOUT) -> int:
+    # Jobs de workers que morreram (sem heartbeat) voltam para a fila
+    now = datetime.now()
+    stale = (DBJob.status == JOB_RUNNING, DBJob.locked_at < now - timedelta(seconds=lease_timeout))
+    error = "Lease expirado: worker parou de responder"
+    requeued = db.execute(update(DBJob).where(*stale, DBJob.attempts < DBJob.max_attempts)
+                          .values(status=JOB_QUEUED, locked_by=None, run_after=now, updated_at=now,
+                                  last_error=error))
+    db.execute(update(DBJob).where(*stale, DBJob.attempts >= DBJob.max_attempts)
+               .values(status=JOB_FAILED, locked_by=None, updated_at=now, finished_at=now, last_error=error))
+    db.commit()
+    return requeued.rowcount
@@ -0,0 +1,61 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, List
+
+from src.utils.metrics import registry
+
+batch_sizes = registry.histogram("llm_batch_size", "Prompts por chamada em lote ao provedor",
+                                 buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+batch_wait = registry.histogram("llm_batch_wait_seconds", "Espera de um prompt até o envio do lote")
+
+class MicroBatcher:
+    # Junta os itens que chegam dentro de uma janela de `max_wait` segundos (ou
+    # até `max_size` itens) numa única chamada `send_batch(group, items)`, que
+    # devolve um resultado por item, na mesma ordem. Só itens do mesmo `group`
+    # (ex.: mesmo modelo e parâmetros) vão juntos. Pertence a um único loop.
+    def __init__(self, send_batch: Callable[[Hashable, List], Awaitable[List]],
+                 max_size: int, max_wait: float):
+        self.send_batch = send_batch
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._pending = {}
+        self._timers = {}
+        self._tasks = set()
+
+    async def submit(self, group: Hashable, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(group, [])
+        batch.append((item, future, loop.time()))
+        if len(batch) >= self.max_size:
+            self._flush(group)
+        elif len(batch) == 1:
+            self._timers[group] = loop.call_later(self.max_wait, self._flush, group)
+        return await future
+
+    def _flush(self, group):
+        timer = self._timers.pop(group, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(group, None)
+        if not batch:
+            return
+        # O envio roda numa task própria: cancelar um chamador não derruba o lote
+        task = asyncio.get_running_loop().create_task(self._send(group, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, group, batch):
+        now = asyncio.get_running_loop().time()
+        batch_sizes.observe(len(batch))
+        for _, _, queued_at in batch:
+            batch_wait.observe(now - queued_at)
+        try:
+            results = await self.send_batch(group, [item for item, _, _ in batch])
+        except Exception as exc:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
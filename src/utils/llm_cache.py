@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, delete, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from src.utils.cache import LRUCache
+from src.utils.database import SessionLocal, DBLLMCacheEntry
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_MEMORY_SIZE = int(os.getenv("LLM_CACHE_MEMORY_SIZE", "2048"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_SQL = os.getenv("LLM_CACHE_SQL", "0") == "1"
+LLM_CACHE_SQL_MAX_ROWS = int(os.getenv("LLM_CACHE_SQL_MAX_ROWS", "100000"))
+
+logger = logging.getLogger(__name__)
+
+def make_cache_key(model: str, prompt: str, params: dict) -> str:
+    raw = json.dumps({"model": model, "prompt": prompt, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class SQLCacheTier:
+    # Tier persistente (tabela llm_cache), compartilhado entre processos.
+    # A poda por tamanho remove as entradas menos acessadas recentemente e só
+    # roda a cada `prune_every` escritas para não pagar um COUNT por chamada.
+    def __init__(self, session_factory=SessionLocal, ttl: float = LLM_CACHE_TTL,
+                 max_rows: int = LLM_CACHE_SQL_MAX_ROWS, prune_every: int = 100):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        now = datetime.utcnow()
+        with self.session_factory() as db:
+            entry = db.get(DBLLMCacheEntry, key)
+            if entry is None or (entry.expires_at is not None and entry.expires_at <= now):
+                self.misses += 1
+                return None
+            db.execute(update(DBLLMCacheEntry).where(DBLLMCacheEntry.key == key)
+                       .values(last_accessed_at=now))
+            db.commit()
+            self.hits += 1
+            return entry.response
+
+    def set(self, key: str, model: str, response: str):
+        now = datetime.utcnow()
+        values = dict(model=model, response=response, created_at=now,
+                      expires_at=now + timedelta(seconds=self.ttl) if self.ttl else None, last_accessed_at=now)
+        with self.session_factory() as db:
+            db.merge(DBLLMCacheEntry(key=key, **values))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Outro processo inseriu a mesma chave entre o SELECT do merge e o INSERT
+                db.rollback()
+                db.execute(update(DBLLMCacheEntry).where(DBLLMCacheEntry.key == key).values(**values))
+                db.commit()
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % self.prune_every == 0
+        if should_prune:
+            self.prune()
+
+    def prune(self):
+        now = datetime.utcnow()
+        with self.session_factory() as db:
+            db.execute(delete(DBLLMCacheEntry).where(DBLLMCacheEntry.expires_at <= now))
+            # Manter apenas as `max_rows` entradas acessadas mais recentemente
+            cutoff = db.execute(select(DBLLMCacheEntry.last_accessed_at)
+                                .order_by(DBLLMCacheEntry.last_accessed_at.desc())
+                                .offset(self.max_rows).limit(1)).scalar()
+            if cutoff is not None:
+                db.execute(delete(DBLLMCacheEntry).where(DBLLMCacheEntry.last_accessed_at <= cutoff))
+            db.commit()
+
+    def clear(self):
+        with self.session_factory() as db:
+            db.execute(delete(DBLLMCacheEntry))
+            db.commit()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+class LLMResponseCache:
+    def __init__(self, memory_size: int = LLM_CACHE_MEMORY_SIZE, ttl: float = LLM_CACHE_TTL,
+                 sql_tier: Optional[SQLCacheTier] = None):
+        self.memory = LRUCache(maxsize=memory_size, ttl=ttl)
+        self.sql = sql_tier
+
+    # O tier SQL é só otimização: falha no banco vira miss (ou gravação perdida),
+    # nunca erro da chamada ao LLM, que a essa altura pode já ter sido paga
+    def _sql_get(self, key: str) -> Optional[str]:
+        try:
+            return self.sql.get(key)
+        except SQLAlchemyError:
+            logger.warning("Falha ao ler o cache de LLM no banco", exc_info=True)
+            return None
+
+    def _sql_set(self, key: str, model: str, response: str):
+        try:
+            self.sql.set(key, model, response)
+        except SQLAlchemyError:
+            logger.warning("Falha ao gravar o cache de LLM no banco", exc_info=True)
+
+    def get(self, key: str) -> Optional[str]:
+        response = self.memory.get(key)
+        if response is None and self.sql is not None:
+            response = self._sql_get(key)
+            if response is not None:
+                # Promover para o tier em memória
+                self.memory.set(key, response)
+        return response
+
+    def set(self, key: str, model: str, response: str):
+        self.memory.set(key, response)
+        if self.sql is not None:
+            self._sql_set(key, model, response)
+
+    # Variantes para o event loop: o tier SQL é bloqueante e roda em thread,
+    # acertos no tier em memória não pagam o salto de thread.
+    async def aget(self, key: str) -> Optional[str]:
+        response = self.memory.get(key)
+        if response is None and self.sql is not None:
+            response = await asyncio.to_thread(self._sql_get, key)
+            if response is not None:
+                self.memory.set(key, response)
+        return response
+
+    async def aset(self, key: str, model: str, response: str):
+        self.memory.set(key, response)
+        if self.sql is not None:
+            await asyncio.to_thread(self._sql_set, key, model, response)
+
+    def clear(self):
+        self.memory.clear()
+        if self.sql is not None:
+            self.sql.clear()
+
+    def stats(self) -> dict:
+        stats = {"memory": self.memory.stats()}
+        if self.sql is not None:
+            stats["sql"] = self.sql.stats()
+        return stats
+
+response_cache = LLMResponseCache(sql_tier=SQLCacheTier() if LLM_CACHE_SQL else None) if LLM_CACHE_ENABLED else None
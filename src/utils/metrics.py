@@ -0,0 +1,116 @@
+import bisect
+import threading
+from typing import Callable, Dict, Optional
+
+# Métricas em processo, exportadas em formato Prometheus por GET /metrics
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+class Gauge:
+    # Valor atual; com `fn`, é lido na hora da coleta (ex.: tamanho de fila)
+    def __init__(self, fn: Optional[Callable[[], float]] = None):
+        self.fn = fn
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> float:
+        return self.fn() if self.fn is not None else self._value
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[tuple, object] = {}
+        self._help: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, kind, name, description, labels, factory):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = self._metrics[key] = factory()
+                self._help[name] = (kind, description)
+            return metric
+
+    def counter(self, name: str, description: str = "", labels: Optional[dict] = None) -> Counter:
+        return self._get_or_create("counter", name, description, labels, Counter)
+
+    def gauge(self, name: str, description: str = "", labels: Optional[dict] = None,
+              fn: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._get_or_create("gauge", name, description, labels, lambda: Gauge(fn))
+
+    def histogram(self, name: str, description: str = "", labels: Optional[dict] = None,
+                  buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create("histogram", name, description, labels, lambda: Histogram(buckets))
+
+    def snapshot(self) -> dict:
+        snapshot = {}
+        for (name, labels), metric in list(self._metrics.items()):
+            key = name + _format_labels(labels)
+            if isinstance(metric, Histogram):
+                snapshot[key] = {"count": metric.count, "sum": metric.sum}
+            else:
+                snapshot[key] = metric.value
+        return snapshot
+
+    def render_prometheus(self) -> str:
+        lines = []
+        seen = set()
+        for (name, labels), metric in sorted(self._metrics.items(), key=lambda item: item[0]):
+            if name not in seen:
+                kind, description = self._help[name]
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                seen.add(name)
+            if isinstance(metric, Histogram):
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float("inf"),), metric.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {metric.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {metric.count}")
+            else:
+                lines.append(f"{name}{_format_labels(labels)} {metric.value}")
+        return "\n".join(lines) + "\n"
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+registry = MetricsRegistry()
@@ -0,0 +1,20 @@
+import base64
+import json
+from datetime import datetime
+
+# Cursor opaco para paginação por chave (updated_at, id)
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(updated_at: datetime, id: int) -> str:
+    raw = json.dumps([updated_at.isoformat() if updated_at else None, id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, id = json.loads(raw)
+        return (datetime.fromisoformat(updated_at) if updated_at else None), int(id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Cursor inválido") from e
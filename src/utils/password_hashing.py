@@ -0,0 +1,74 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from passlib.context import CryptContext
+from src.utils.metrics import registry
+
+# bcrypt custa ~100-300 ms de CPU; fora do event loop, num pool limitado
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "256"))
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")  # thread | process
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+queue_depth = registry.gauge("password_hash_queue_depth", "Operações de hash aguardando ou em execução")
+rejected = registry.counter("password_hash_rejected_total", "Operações recusadas com a fila cheia")
+queue_wait = registry.histogram("password_hash_queue_wait_seconds", "Espera na fila do pool de hash")
+duration = registry.histogram("password_hash_duration_seconds", "Tempo de CPU do hash/verificação")
+
+class PasswordHasherBusy(Exception):
+    pass
+
+def _timed(operation, *args):
+    # Roda no worker (thread ou processo); devolve os instantes para as métricas
+    started = time.time()
+    result = getattr(pwd_context, operation)(*args)
+    return result, started, time.time()
+
+class PasswordHasher:
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE,
+                 use_processes: bool = PASSWORD_HASH_EXECUTOR == "process"):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.use_processes = use_processes
+        self._executor = None
+        self._pending = 0
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self._executor = executor_class(max_workers=self.workers)
+        return self._executor
+
+    async def _run(self, operation, *args):
+        if self._pending >= self.max_queue:
+            rejected.inc()
+            raise PasswordHasherBusy("Fila de hash de senha cheia")
+        self._pending += 1
+        queue_depth.inc()
+        submitted = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(self.executor, _timed, operation, *args)
+        finally:
+            self._pending -= 1
+            queue_depth.dec()
+        queue_wait.observe(started - submitted)
+        duration.observe(finished - started)
+        return result
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,198 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from src.utils.database import SessionLocal, DBRateLimitBucket
+from src.utils.metrics import registry
+
+# Cota do provedor LLM (0 = sem limite)
+LLM_RPM = float(os.getenv("LLM_RPM", "0"))
+LLM_TPM = float(os.getenv("LLM_TPM", "0"))
+# Com 1, os baldes ficam na tabela rate_limit_buckets e valem para todos os processos
+LLM_RATE_LIMIT_SHARED = os.getenv("LLM_RATE_LIMIT_SHARED", "0") == "1"
+# Tokens de saída presumidos quando a chamada não informa max_tokens
+LLM_COMPLETION_TOKENS_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "512"))
+# Concorrência adaptativa (AIMD): começa em LLM_MAX_CONCURRENCY e fica entre o mínimo e ele
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+# Latência acima da qual a concorrência também é reduzida (0 = só reage a 429)
+LLM_LATENCY_TARGET = float(os.getenv("LLM_LATENCY_TARGET", "0"))
+
+concurrency_limit = registry.gauge("llm_concurrency_limit", "Limite atual de chamadas simultâneas ao provedor")
+in_flight = registry.gauge("llm_in_flight", "Chamadas ao provedor em andamento")
+throttled = registry.counter("llm_throttled_total", "Respostas 429 do provedor")
+request_seconds = registry.histogram("llm_request_seconds", "Latência das chamadas ao provedor")
+
+class TokenBucket:
+    # Balde de `rate_per_minute` unidades por minuto, compartilhado pelas threads
+    # do processo. Quem reserva além do saldo deixa o balde negativo e espera a
+    # reposição, então os chamadores são atendidos em ordem de chegada.
+    def __init__(self, name: str, rate_per_minute: float, capacity: Optional[float] = None):
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.wait = registry.histogram("llm_rate_limit_wait_seconds", "Espera imposta pelo limitador de taxa",
+                                       labels={"bucket": name})
+        registry.gauge("llm_rate_limit_available", "Saldo atual do balde", labels={"bucket": name},
+                       fn=lambda: self.tokens)
+
+    def reserve(self, amount: float) -> float:
+        # Debita `amount` e devolve quantos segundos esperar até ele estar coberto
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            return max(0.0, -self.tokens / self.rate)
+
+    def adjust(self, amount: float):
+        # Corrige a estimativa depois que o provedor informa o consumo real
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+    async def acquire(self, amount: float = 1.0):
+        delay = self.reserve(amount)
+        self.wait.observe(delay)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class SQLTokenBucket(TokenBucket):
+    # Mesmo balde, com o saldo numa linha de rate_limit_buckets. A atualização é
+    # condicional ao updated_at lido (concorrência otimista), o que funciona
+    # igual no Postgres e no SQLite.
+    def __init__(self, name: str, rate_per_minute: float, capacity: Optional[float] = None,
+                 session_factory=SessionLocal, max_attempts: int = 10):
+        super().__init__(name, rate_per_minute, capacity)
+        self.session_factory = session_factory
+        self.max_attempts = max_attempts
+
+    def reserve(self, amount: float) -> float:
+        with self.session_factory() as db:
+            for _ in range(self.max_attempts):
+                now = time.time()
+                row = db.execute(select(DBRateLimitBucket.tokens, DBRateLimitBucket.updated_at)
+                                 .where(DBRateLimitBucket.name == self.name)).first()
+                if row is None:
+                    db.add(DBRateLimitBucket(name=self.name, tokens=self.capacity - min(amount, self.capacity),
+                                             updated_at=now))
+                    try:
+                        db.commit()
+                    except IntegrityError:
+                        db.rollback()
+                        continue
+                    return 0.0
+                tokens = min(self.capacity, row.tokens + max(0.0, now - row.updated_at) * self.rate)
+                tokens -= min(amount, self.capacity)
+                result = db.execute(update(DBRateLimitBucket)
+                                    .where(DBRateLimitBucket.name == self.name,
+                                           DBRateLimitBucket.updated_at == row.updated_at)
+                                    .values(tokens=tokens, updated_at=now))
+                db.commit()
+                if result.rowcount == 1:
+                    self.tokens = tokens
+                    return max(0.0, -tokens / self.rate)
+        # Disputa demais pela linha: cair para o balde local em vez de travar a chamada
+        return super().reserve(amount)
+
+    def adjust(self, amount: float):
+        with self.session_factory() as db:
+            db.execute(update(DBRateLimitBucket).where(DBRateLimitBucket.name == self.name)
+                       .values(tokens=DBRateLimitBucket.tokens - amount))
+            db.commit()
+
+    async def acquire(self, amount: float = 1.0):
+        delay = await asyncio.to_thread(self.reserve, amount)
+        self.wait.observe(delay)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class RateLimiter:
+    # Limites de requisições e de tokens por minuto do provedor
+    def __init__(self, rpm: float = LLM_RPM, tpm: float = LLM_TPM, shared: bool = LLM_RATE_LIMIT_SHARED):
+        bucket_class = SQLTokenBucket if shared else TokenBucket
+        self.requests = bucket_class("requests", rpm) if rpm > 0 else None
+        self.tokens = bucket_class("tokens", tpm) if tpm > 0 else None
+
+    async def acquire(self, tokens: int):
+        if self.requests is not None:
+            await self.requests.acquire(1)
+        if self.tokens is not None:
+            await self.tokens.acquire(tokens)
+
+    async def settle(self, estimated: int, actual: Optional[int]):
+        if self.tokens is not None and actual is not None and actual != estimated:
+            if isinstance(self.tokens, SQLTokenBucket):
+                await asyncio.to_thread(self.tokens.adjust, actual - estimated)
+            else:
+                self.tokens.adjust(actual - estimated)
+
+def estimate_tokens(payload: dict) -> int:
+    # ~4 caracteres por token na entrada, mais o teto de saída de cada prompt
+    if "messages" in payload:
+        prompts = [" ".join(str(message.get("content", "")) for message in payload["messages"])]
+    else:
+        prompts = payload["prompt"] if isinstance(payload.get("prompt"), list) else [payload.get("prompt", "")]
+    completion = payload.get("max_tokens") or LLM_COMPLETION_TOKENS_ESTIMATE
+    return sum(len(prompt) // 4 + completion for prompt in prompts)
+
+class AdaptiveConcurrency:
+    # Limite de chamadas simultâneas com AIMD: +1/limite a cada sucesso (≈ +1 por
+    # rodada de chamadas), metade a cada 429 e ×0.9 quando a latência passa do
+    # alvo. Reduções valem no máximo uma vez por latência média, já que as
+    # respostas de uma mesma rodada refletem a mesma sobrecarga. Pertence a um
+    # único event loop.
+    def __init__(self, max_limit: int, min_limit: int = LLM_MIN_CONCURRENCY,
+                 latency_target: float = LLM_LATENCY_TARGET, decrease_factor: float = 0.5,
+                 cooldown: float = 1.0):
+        self.max_limit = max_limit
+        self.min_limit = max(1, min(min_limit, max_limit))
+        self.limit = float(max_limit)
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+        concurrency_limit.set(self.limit)
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        in_flight.inc()
+        return self
+
+    async def __aexit__(self, *exc):
+        in_flight.dec()
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify(max(1, int(self.limit) - self.in_flight))
+
+    def on_success(self, latency: float):
+        request_seconds.observe(latency)
+        self.cooldown = 0.8 * self.cooldown + 0.2 * latency
+        if self.latency_target and latency > self.latency_target:
+            self._decrease(0.9)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            concurrency_limit.set(self.limit)
+
+    def on_overload(self):
+        throttled.inc()
+        self._decrease(self.decrease_factor)
+
+    def _decrease(self, factor: float):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * factor)
+        concurrency_limit.set(self.limit)
+
+rate_limiter = RateLimiter()
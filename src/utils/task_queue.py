@@ -0,0 +1,174 @@
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update, delete, exists, and_, func
+from sqlalchemy.orm import Session, aliased
+from src.utils.database import DBChecklistPhase, DBChecklistTask, DBChecklistTaskDependency, supports_skip_locked
+from src.utils import checklist_store
+from src.agents.task_graph import TaskGraph
+
+# Tarefas do checklist executadas por runners (src/runner.py). Uma tarefa na
+# fila só pode ser pega quando todas as tarefas das quais depende terminaram.
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "3"))
+TASK_LEASE_TIMEOUT = float(os.getenv("TASK_LEASE_TIMEOUT", "300"))
+
+def queue_phases(db: Session, project_id: int, phases, resume: bool = True) -> int:
+    # Põe na fila as tarefas das fases, gravando o grafo de dependências entre as linhas
+    checklist_store.create_checklist(db, project_id)
+    checklist, task_ids = checklist_store.load_checklist(db, project_id)
+    graph = TaskGraph.from_checklist(checklist, phases)
+    graph.topological_order()  # falha cedo se houver ciclo
+    ids = [task_ids[key] for key in graph.tasks]
+    now = datetime.now()
+
+    db.execute(delete(DBChecklistTaskDependency).where(DBChecklistTaskDependency.task_id.in_(ids)))
+    db.add_all([DBChecklistTaskDependency(task_id=task_ids[key], depends_on_id=task_ids[dep])
+                for key in graph.tasks for dep in graph.dependencies[key]])
+    values = dict(status=checklist_store.STATUS_QUEUED, queued_at=now, updated_at=now, attempts=0,
+                  last_error=None, locked_by=None, locked_at=None)
+    if not resume:
+        # Com resume, saída e input_hash ficam: o runner reaproveita a saída se a entrada não mudou
+        values.update(output=None, input_hash=None)
+    db.execute(update(DBChecklistTask).where(DBChecklistTask.id.in_(ids)).values(**values))
+    db.commit()
+    for phase in phases:
+        checklist_store.set_phase_status(db, project_id, phase, checklist_store.STATUS_IN_PROGRESS)
+    return len(ids)
+
+def _ready_query():
+    upstream = aliased(DBChecklistTask)
+    blocked = exists().where(DBChecklistTaskDependency.task_id == DBChecklistTask.id,
+                             upstream.id == DBChecklistTaskDependency.depends_on_id,
+                             upstream.status != checklist_store.STATUS_DONE)
+    return (select(DBChecklistTask)
+            .where(DBChecklistTask.status == checklist_store.STATUS_QUEUED, ~blocked)
+            .order_by(DBChecklistTask.queued_at, DBChecklistTask.phase, DBChecklistTask.position)
+            .limit(1))
+
+def claim_task(db: Session, runner_id: str) -> Optional[DBChecklistTask]:
+    now = datetime.now()
+    query = _ready_query()
+
+    if supports_skip_locked(db.get_bind()):
+        # Cada runner pega uma linha diferente sem esperar os locks dos outros
+        task = db.execute(query.with_for_update(skip_locked=True, of=DBChecklistTask)).scalars().first()
+        if task is None:
+            db.rollback()
+            return None
+    else:
+        # Fallback (SQLite): UPDATE condicional; quem perder a corrida tenta de novo depois
+        task = db.execute(query).scalars().first()
+        if task is None:
+            return None
+        claimed = db.execute(update(DBChecklistTask)
+                             .where(DBChecklistTask.id == task.id,
+                                    DBChecklistTask.status == checklist_store.STATUS_QUEUED)
+                             .values(status=checklist_store.STATUS_IN_PROGRESS, locked_by=runner_id, locked_at=now))
+        if claimed.rowcount != 1:
+            db.rollback()
+            return None
+        db.refresh(task)
+
+    task.status = checklist_store.STATUS_IN_PROGRESS
+    task.locked_by = runner_id
+    task.locked_at = now
+    task.attempts = (task.attempts or 0) + 1
+    task.updated_at = now
+    db.commit()
+    return task
+
+def dependency_outputs(db: Session, task_id: int):
+    upstream = aliased(DBChecklistTask)
+    return list(db.execute(select(upstream.output)
+                           .join(DBChecklistTaskDependency, DBChecklistTaskDependency.depends_on_id == upstream.id)
+                           .where(DBChecklistTaskDependency.task_id == task_id)
+                           .order_by(upstream.phase, upstream.description)).scalars())
+
+def heartbeat(db: Session, task_ids, runner_id: str):
+    if not task_ids:
+        return
+    db.execute(update(DBChecklistTask)
+               .where(DBChecklistTask.id.in_(task_ids), DBChecklistTask.locked_by == runner_id)
+               .values(locked_at=datetime.now()))
+    db.commit()
+
+def complete_task(db: Session, task_id: int, runner_id: str, output: str, input_hash: str = None) -> bool:
+    # Só grava se o lease ainda é deste runner; se expirou, outro já refaz a tarefa
+    now = datetime.now()
+    done = db.execute(update(DBChecklistTask)
+                      .where(DBChecklistTask.id == task_id, DBChecklistTask.locked_by == runner_id,
+                             DBChecklistTask.status == checklist_store.STATUS_IN_PROGRESS)
+                      .values(status=checklist_store.STATUS_DONE, output=output, input_hash=input_hash,
+                              locked_by=None, updated_at=now))
+    db.commit()
+    if done.rowcount != 1:
+        return False
+    task = db.get(DBChecklistTask, task_id)
+    pending = db.execute(select(func.count(DBChecklistTask.id))
+                         .where(DBChecklistTask.project_id == task.project_id, DBChecklistTask.phase == task.phase,
+                                DBChecklistTask.status != checklist_store.STATUS_DONE)).scalar()
+    if not pending:
+        checklist_store.set_phase_status(db, task.project_id, task.phase, checklist_store.STATUS_DONE)
+    return True
+
+def _fail_downstream(db: Session, task_ids, now: datetime):
+    # Tarefa que falhou de vez: as que dependem dela (direta ou indiretamente) nunca
+    # ficariam prontas. Falham junto, assim como as fases envolvidas, na mesma
+    # transação de quem chamou (que faz o commit).
+    failed = set(task_ids)
+    frontier = set(task_ids)
+    while frontier:
+        frontier = set(db.execute(select(DBChecklistTaskDependency.task_id)
+                                  .join(DBChecklistTask, DBChecklistTask.id == DBChecklistTaskDependency.task_id)
+                                  .where(DBChecklistTaskDependency.depends_on_id.in_(frontier),
+                                         DBChecklistTask.status == checklist_store.STATUS_QUEUED)).scalars()) - failed
+        failed |= frontier
+    dependents = failed - set(task_ids)
+    if dependents:
+        db.execute(update(DBChecklistTask).where(DBChecklistTask.id.in_(dependents),
+                                                 DBChecklistTask.status == checklist_store.STATUS_QUEUED)
+                   .values(status=checklist_store.STATUS_FAILED, updated_at=now,
+                           last_error="Cancelada: uma tarefa da qual depende falhou"))
+    phases = db.execute(select(DBChecklistTask.project_id, DBChecklistTask.phase)
+                        .where(DBChecklistTask.id.in_(failed)).distinct()).all()
+    for project_id, phase in phases:
+        db.execute(update(DBChecklistPhase)
+                   .where(DBChecklistPhase.project_id == project_id, DBChecklistPhase.phase == phase)
+                   .values(status=checklist_store.STATUS_FAILED, updated_at=now))
+
+def fail_task(db: Session, task_id: int, runner_id: str, error: str):
+    task = db.get(DBChecklistTask, task_id)
+    if task is None or task.locked_by != runner_id:
+        return
+    task.last_error = error
+    task.locked_by = None
+    task.updated_at = datetime.now()
+    # Sem backoff por tarefa: volta para o fim da fila
+    if task.attempts < TASK_MAX_ATTEMPTS:
+        task.status = checklist_store.STATUS_QUEUED
+        task.queued_at = task.updated_at
+    else:
+        task.status = checklist_store.STATUS_FAILED
+        db.flush()
+        _fail_downstream(db, [task_id], task.updated_at)
+    db.commit()
+
+def requeue_stale(db: Session, lease_timeout: float = TASK_LEASE_TIMEOUT) -> int:
+    # Tarefas de runners que morreram (sem heartbeat) voltam para a fila
+    now = datetime.now()
+    stale = and_(DBChecklistTask.status == checklist_store.STATUS_IN_PROGRESS,
+                 DBChecklistTask.locked_by.isnot(None),
+                 DBChecklistTask.locked_at < now - timedelta(seconds=lease_timeout))
+    error = "Lease expirado: runner parou de responder"
+    requeued = db.execute(update(DBChecklistTask).where(stale, DBChecklistTask.attempts < TASK_MAX_ATTEMPTS)
+                          .values(status=checklist_store.STATUS_QUEUED, locked_by=None, queued_at=now,
+                                  updated_at=now, last_error=error))
+    exhausted = list(db.execute(select(DBChecklistTask.id)
+                                .where(stale, DBChecklistTask.attempts >= TASK_MAX_ATTEMPTS)).scalars())
+    if exhausted:
+        db.execute(update(DBChecklistTask).where(DBChecklistTask.id.in_(exhausted))
+                   .values(status=checklist_store.STATUS_FAILED, locked_by=None, updated_at=now, last_error=error))
+        _fail_downstream(db, exhausted, now)
+    db.commit()
+    return requeued.rowcount
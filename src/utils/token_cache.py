@@ -0,0 +1,88 @@
+import hashlib
+import os
+import time
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from src.utils.cache import LRUCache
+from src.utils.database import DBUser
+from src.utils.metrics import registry
+
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+
+# Mudanças nestes campos invalidam o usuário em cache
+INVALIDATING_FIELDS = ("username", "hashed_password", "is_active")
+
+class AuthCache:
+    # Claims decodificadas (por hash do token) e usuários resolvidos (por
+    # username), com TTL curto. A invalidação por evento só vale para este
+    # processo; nos demais o TTL limita quanto tempo um dado antigo sobrevive.
+    def __init__(self, ttl: float = AUTH_CACHE_TTL, maxsize: int = AUTH_CACHE_SIZE):
+        self.ttl = ttl
+        self.claims = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.users = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.lookup_seconds = {
+            result: registry.histogram("auth_lookup_seconds", "Tempo para resolver o usuário do token",
+                                       {"result": result})
+            for result in ("hit", "miss")
+        }
+        self.saved_seconds = registry.counter("auth_cache_saved_seconds_total",
+                                              "Tempo economizado pelos acertos do cache de autenticação")
+        registry.gauge("auth_cache_hit_rate", "Taxa de acerto do cache de usuários", {"cache": "users"},
+                       fn=lambda: self.users.stats()["hit_rate"])
+        registry.gauge("auth_cache_hit_rate", "Taxa de acerto do cache de usuários", {"cache": "claims"},
+                       fn=lambda: self.claims.stats()["hit_rate"])
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get_username(self, token: str) -> Optional[str]:
+        return self.claims.get(self.token_key(token))
+
+    def set_username(self, token: str, username: str, exp: Optional[float] = None):
+        ttl = self.ttl
+        if exp is not None:
+            # Nunca aceitar o token do cache depois que ele expira
+            ttl = min(ttl, exp - time.time())
+            if ttl <= 0:
+                return
+        self.claims.set(self.token_key(token), username, ttl=ttl)
+
+    def get_user(self, username: str):
+        return self.users.get(username)
+
+    def set_user(self, username: str, user):
+        self.users.set(username, user)
+
+    def invalidate_user(self, username: str):
+        self.users.pop(username)
+
+    def observe(self, hit: bool, seconds: float):
+        self.lookup_seconds["hit" if hit else "miss"].observe(seconds)
+        if hit:
+            misses = self.lookup_seconds["miss"]
+            if misses.count:
+                self.saved_seconds.inc(max(misses.sum / misses.count - seconds, 0.0))
+
+    def stats(self) -> dict:
+        return {"claims": self.claims.stats(), "users": self.users.stats(),
+                "saved_seconds": self.saved_seconds.value}
+
+auth_cache = AuthCache()
+
+@event.listens_for(DBUser, "after_update")
+def _invalidate_updated_user(mapper, connection, target):
+    state = inspect(target)
+    for field in INVALIDATING_FIELDS:
+        history = state.attrs[field].history
+        if history.has_changes():
+            auth_cache.invalidate_user(target.username)
+            for old in history.deleted or ():
+                if field == "username" and old:
+                    auth_cache.invalidate_user(old)
+
+@event.listens_for(DBUser, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target):
+    auth_cache.invalidate_user(target.username)
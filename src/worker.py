@@ -0,0 +1,135 @@
+import sys
+from pathlib import Path
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+from dotenv import load_dotenv
+
+# Adicione o diretório raiz do projeto ao PYTHONPATH
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(root_dir))
+
+from src.utils.database import SessionLocal, DBProject
+from src.utils import job_queue
+from src.utils.ai_integration import process_project_with_gpt
+from src.agents.agent_manager import AgentManager
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+# Espera depois de uma falha do banco antes de tentar a fila de novo
+JOB_ERROR_BACKOFF = float(os.getenv("JOB_ERROR_BACKOFF", "5"))
+
+@job_queue.register_handler("process_project")
+def process_project(payload):
+    project_id = payload["project_id"]
+    with SessionLocal() as db:
+        project = db.get(DBProject, project_id)
+        if project is None:
+            # Apagado enquanto o job rodava ou esperava: nada a processar, sem novas tentativas
+            return
+
+        # Process with GPT-4
+        projeto = process_project_with_gpt(project)
+
+    # Start agent manager
+    agent_manager = AgentManager()
+    agent_manager.process_project(project_id, projeto)
+
+@job_queue.register_handler("reprocess_project")
+def reprocess_project(payload):
+    # Depois de PUT /projects/{id}: só as tarefas cuja entrada mudou rodam de novo
+    AgentManager().reprocess_project(payload["project_id"])
+
+def run_job(job_id, kind, payload, worker_id):
+    # Mantém o lease vivo enquanto o job roda para não ser reenfileirado
+    stop = threading.Event()
+    logger = logging.getLogger(f"worker.{worker_id}")
+
+    def beat():
+        interval = job_queue.JOB_LEASE_TIMEOUT / 3
+        while not stop.wait(interval):
+            try:
+                # Sessão por batida: nenhuma conexão fica presa durante o job
+                with SessionLocal() as db:
+                    job_queue.heartbeat(db, job_id, worker_id)
+                interval = job_queue.JOB_LEASE_TIMEOUT / 3
+            except Exception:
+                # Sem heartbeat agora; tenta de novo antes do lease expirar
+                logger.exception(f"Falha no heartbeat do job {job_id}")
+                interval = min(JOB_ERROR_BACKOFF, job_queue.JOB_LEASE_TIMEOUT / 3)
+
+    heartbeat_thread = threading.Thread(target=beat, daemon=True)
+    heartbeat_thread.start()
+    try:
+        job_queue.HANDLERS[kind](json.loads(payload))
+    finally:
+        stop.set()
+        heartbeat_thread.join()
+
+def worker_loop(worker_id, kinds=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(f"worker.{worker_id}")
+    logger.info("Worker iniciado")
+    last_reap = 0.0
+    while True:
+        try:
+            # expire_on_commit=False: os campos do job seguem carregados depois do commit do
+            # claim, sem um SELECT que abriria outra transação nesta sessão
+            with SessionLocal(expire_on_commit=False) as db:
+                if time.monotonic() - last_reap > job_queue.JOB_LEASE_TIMEOUT / 3:
+                    requeued = job_queue.requeue_stale(db)
+                    if requeued:
+                        logger.warning(f"{requeued} job(s) reenfileirado(s) por lease expirado")
+                    last_reap = time.monotonic()
+
+                job = job_queue.claim_job(db, worker_id, kinds)
+                if job is not None:
+                    job_id, kind, payload, attempts = job.id, job.kind, job.payload, job.attempts
+            if job is None:
+                time.sleep(JOB_POLL_INTERVAL)
+                continue
+
+            # O job roda sem sessão aberta; conclusão e falha usam uma nova
+            logger.info(f"Executando job {job_id} ({kind}), tentativa {attempts}")
+            try:
+                run_job(job_id, kind, payload, worker_id)
+            except Exception:
+                logger.exception(f"Job {job_id} falhou")
+                with SessionLocal() as db:
+                    job_queue.fail_job(db, job_id, worker_id, traceback.format_exc())
+            else:
+                with SessionLocal() as db:
+                    completed = job_queue.complete_job(db, job_id, worker_id)
+                if completed:
+                    logger.info(f"Job {job_id} concluído")
+                else:
+                    logger.warning(f"Job {job_id}: lease perdido, outro worker o executa de novo")
+        except Exception:
+            # Falha do banco (conexão caída, "database is locked"): o worker continua;
+            # um job que ficou sem conclusão volta à fila quando o lease expirar
+            logger.exception("Falha ao acessar a fila de jobs")
+            time.sleep(JOB_ERROR_BACKOFF)
+
+if __name__ == "__main__":
+    # Carregar variáveis de ambiente
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Workers da fila de jobs")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("JOB_WORKERS", "2")))
+    parser.add_argument("--kind", action="append", dest="kinds", help="Processar só estes tipos de job")
+    args = parser.parse_args()
+
+    hostname = socket.gethostname()
+    # spawn: cada worker abre as próprias conexões em vez de herdar as do pai
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=worker_loop, args=(f"{hostname}-{os.getpid()}-{i}", args.kinds))
+                 for i in range(args.workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
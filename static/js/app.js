@@ -55,7 +55,46 @@ document.addEventListener('DOMContentLoaded', () => {
     }
     
 
+    // Um único EventSource por página, do projeto selecionado: no HTTP/1.1 o
+    // navegador abre só ~6 conexões por host, e um stream por card travaria os fetch
+    let projectStream = null;
+
+    function stopWatching() {
+        if (projectStream) {
+            projectStream.close();
+            projectStream = null;
+        }
+    }
+
+    function watchProject(id, progressElement) {
+        stopWatching();
+        // EventSource não envia cabeçalhos, o token vai na query string
+        const token = localStorage.getItem('token');
+        const source = new EventSource(`/projects/${id}/events?token=${encodeURIComponent(token)}`);
+        const phases = {};
+        const render = () => {
+            progressElement.textContent = Object.keys(phases)
+                .map(phase => `Fase ${phase}: ${phases[phase]}`)
+                .join(' | ');
+        };
+        source.addEventListener('snapshot', event => {
+            JSON.parse(event.data).phases.forEach(({ phase, status }) => { phases[phase] = status; });
+            render();
+        });
+        source.addEventListener('phase', event => {
+            const { phase, status } = JSON.parse(event.data);
+            phases[phase] = status;
+            render();
+        });
+        source.addEventListener('task', event => {
+            const { phase, task, status } = JSON.parse(event.data);
+            progressElement.title = `Fase ${phase}: ${task} (${status})`;
+        });
+        projectStream = source;
+    }
+
     function displayProjects(projects) {
+        stopWatching();
         projectList.innerHTML = '';
         projects.forEach(project => {
             const projectElement = document.createElement('div');
@@ -66,10 +105,15 @@ document.addEventListener('DOMContentLoaded', () => {
                 <p>Deadline: ${new Date(project.deadline).toLocaleString()}</p>
                 <p>Status: ${project.status}</p>
                 <p>Current Phase: ${project.current_phase}</p>
+                <p class="project-progress"></p>
+                <button class="watch-progress">Progress</button>
                 <button onclick="editProject(${project.id})">Edit</button>
                 <button onclick="deleteProject(${project.id})">Delete</button>
             `;
             projectList.appendChild(projectElement);
+            projectElement.querySelector('.watch-progress').addEventListener('click', () => {
+                watchProject(project.id, projectElement.querySelector('.project-progress'));
+            });
         });
     }
 
@@ -0,0 +1,48 @@
+import asyncio
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from src.agents.agent_pool import AgentTypePool
+
+
+def test_cancelled_waiter_returns_handed_off_agent():
+    async def scenario():
+        pool = AgentTypePool("teste", object, max_size=1)
+        agent = await pool.acquire()
+        waiter = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+        assert len(pool._waiters) == 1
+
+        # _handoff entrega a instância e o waiter é cancelado antes de retomar
+        pool.release(agent)
+        await asyncio.sleep(0)
+        waiter.cancel()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            pass
+
+        assert await asyncio.wait_for(pool.acquire(), timeout=1) is agent
+        assert pool.created == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_before_handoff():
+    async def scenario():
+        pool = AgentTypePool("teste", object, max_size=1)
+        agent = await pool.acquire()
+        waiter = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            pass
+
+        assert not pool._waiters
+        pool.release(agent)
+        assert await asyncio.wait_for(pool.acquire(), timeout=1) is agent
+
+    asyncio.run(scenario())
@@ -0,0 +1,99 @@
+import os
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from sqlalchemy import delete, update
+
+from src.utils import job_queue
+from src.utils.database import SessionLocal, DBJob
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+        session.rollback()
+        session.execute(delete(DBJob))
+        session.commit()
+
+
+def make_ready(db, job_id):
+    # Pula o backoff da nova tentativa
+    db.execute(update(DBJob).where(DBJob.id == job_id).values(run_after=datetime.now() - timedelta(seconds=1)))
+    db.commit()
+
+
+def test_claim_and_complete(db):
+    job = job_queue.enqueue(db, "teste", {"n": 1})
+    claimed = job_queue.claim_job(db, "w1")
+    assert claimed.id == job.id
+    assert claimed.status == job_queue.JOB_RUNNING and claimed.attempts == 1
+    assert job_queue.claim_job(db, "w2") is None
+
+    # Só o dono do lease conclui
+    assert not job_queue.complete_job(db, job.id, "w2")
+    assert job_queue.complete_job(db, job.id, "w1")
+    db.expire_all()
+    assert db.get(DBJob, job.id).status == job_queue.JOB_SUCCEEDED
+
+
+def test_claim_filters_kinds(db):
+    job_queue.enqueue(db, "outro", {})
+    assert job_queue.claim_job(db, "w1", kinds=["teste"]) is None
+    assert job_queue.claim_job(db, "w1", kinds=["outro"]) is not None
+
+
+def test_failed_job_retries_until_max_attempts(db):
+    job = job_queue.enqueue(db, "teste", {}, max_attempts=2)
+    job_queue.claim_job(db, "w1")
+    job_queue.fail_job(db, job.id, "w1", "erro 1")
+    db.expire_all()
+    assert db.get(DBJob, job.id).status == job_queue.JOB_QUEUED
+    # Ainda no backoff
+    assert job_queue.claim_job(db, "w1") is None
+
+    make_ready(db, job.id)
+    assert job_queue.claim_job(db, "w1").attempts == 2
+    job_queue.fail_job(db, job.id, "w1", "erro 2")
+    db.expire_all()
+    failed = db.get(DBJob, job.id)
+    assert failed.status == job_queue.JOB_FAILED and failed.last_error == "erro 2"
+
+
+def test_expired_lease_is_requeued(db):
+    job = job_queue.enqueue(db, "teste", {})
+    job_queue.claim_job(db, "w1")
+    db.execute(update(DBJob).where(DBJob.id == job.id).values(locked_at=datetime.now() - timedelta(seconds=60)))
+    db.commit()
+
+    assert job_queue.requeue_stale(db, lease_timeout=30) == 1
+    assert job_queue.claim_job(db, "w2").id == job.id
+    # O worker antigo perdeu o lease
+    assert not job_queue.complete_job(db, job.id, "w1")
+    assert job_queue.complete_job(db, job.id, "w2")
+
+
+def test_serial_key_runs_jobs_in_order(db):
+    first = job_queue.enqueue(db, "teste", {}, serial_key="project:1")
+    second = job_queue.enqueue(db, "teste", {}, serial_key="project:1")
+    other = job_queue.enqueue(db, "teste", {}, serial_key="project:2")
+
+    assert job_queue.claim_job(db, "w1").id == first.id
+    # O segundo job do projeto 1 espera o primeiro; o do projeto 2 não
+    assert job_queue.claim_job(db, "w2").id == other.id
+    assert job_queue.claim_job(db, "w3") is None
+    job_queue.complete_job(db, first.id, "w1")
+    assert job_queue.claim_job(db, "w3").id == second.id
+
+
+def test_cancel_queued_keeps_running_jobs(db):
+    running = job_queue.enqueue(db, "teste", {}, serial_key="project:1").id
+    queued = job_queue.enqueue(db, "teste", {}, serial_key="project:1").id
+    job_queue.claim_job(db, "w1")
+    db.execute(job_queue.cancel_queued(["project:1"]))
+    db.commit()
+    db.expunge_all()
+    assert db.get(DBJob, queued) is None
+    assert db.get(DBJob, running) is not None
@@ -0,0 +1,97 @@
+import os
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from sqlalchemy import delete, update
+
+from src.utils import checklist_store, task_queue
+from src.utils.database import (SessionLocal, DBProject, DBChecklistPhase, DBChecklistTask,
+                                DBChecklistTaskDependency)
+
+# Fase 2 sem "Dependencias": barreira sobre a fase 1; a fase 3 depende só de "C"
+TEMPLATE = {
+    "Fase 1": {"Status": checklist_store.STATUS_NOT_STARTED, "Tarefas": ["A", "B"]},
+    "Fase 2": {"Status": checklist_store.STATUS_NOT_STARTED, "Tarefas": ["C"]},
+    "Fase 3": {"Status": checklist_store.STATUS_NOT_STARTED, "Tarefas": ["D"],
+               "Dependencias": {"D": ["Fase 2/C"]}},
+}
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        project = DBProject(name="teste", description="fila de tarefas")
+        session.add(project)
+        session.commit()
+        checklist_store.create_checklist(session, project.id, TEMPLATE)
+        task_queue.queue_phases(session, project.id, [1, 2, 3])
+        session.project_id = project.id
+        yield session
+        session.rollback()
+        for table in (DBChecklistTaskDependency, DBChecklistTask, DBChecklistPhase, DBProject):
+            session.execute(delete(table))
+        session.commit()
+
+
+def statuses(db):
+    db.expire_all()
+    return {task.description: task.status for task in db.query(DBChecklistTask)}
+
+
+def test_claim_respects_dependencies(db):
+    first = task_queue.claim_task(db, "r1")
+    second = task_queue.claim_task(db, "r2")
+    assert {first.description, second.description} == {"A", "B"}
+    # "C" espera as duas tarefas da fase 1
+    assert task_queue.claim_task(db, "r3") is None
+
+    assert task_queue.complete_task(db, first.id, "r1", "saída A")
+    assert task_queue.claim_task(db, "r3") is None
+    assert task_queue.complete_task(db, second.id, "r2", "saída B")
+
+    third = task_queue.claim_task(db, "r3")
+    assert third.description == "C"
+    assert sorted(task_queue.dependency_outputs(db, third.id)) == ["saída A", "saída B"]
+    phase = db.query(DBChecklistPhase).filter_by(project_id=db.project_id, phase=1).one()
+    assert phase.status == checklist_store.STATUS_DONE
+
+
+def test_complete_requires_current_lease(db):
+    task = task_queue.claim_task(db, "r1")
+    assert not task_queue.complete_task(db, task.id, "outro", "saída")
+    assert task_queue.complete_task(db, task.id, "r1", "saída")
+
+
+def test_expired_lease_is_requeued(db):
+    task = task_queue.claim_task(db, "r1")
+    db.execute(update(DBChecklistTask).where(DBChecklistTask.id == task.id)
+               .values(locked_at=datetime.now() - timedelta(seconds=60)))
+    db.commit()
+
+    assert task_queue.requeue_stale(db, lease_timeout=30) == 1
+    assert statuses(db)[task.description] == checklist_store.STATUS_QUEUED
+    # O runner antigo perdeu o lease e não pode mais concluir
+    assert not task_queue.complete_task(db, task.id, "r1", "saída")
+
+
+def test_permanent_failure_cancels_dependents(db):
+    claimed = {task.description: task for task in (task_queue.claim_task(db, "r1"), task_queue.claim_task(db, "r2"))}
+    task, runner = claimed["A"], claimed["A"].locked_by
+    for attempt in range(task_queue.TASK_MAX_ATTEMPTS):
+        if attempt:
+            db.execute(update(DBChecklistTask).where(DBChecklistTask.id == task.id)
+                       .values(status=checklist_store.STATUS_IN_PROGRESS, locked_by=runner,
+                               attempts=attempt + 1))
+            db.commit()
+        task_queue.fail_task(db, task.id, runner, "erro")
+
+    result = statuses(db)
+    assert result["A"] == checklist_store.STATUS_FAILED
+    assert result["C"] == result["D"] == checklist_store.STATUS_FAILED
+    # "B" não depende de "A": segue com o runner que a pegou
+    assert result["B"] == checklist_store.STATUS_IN_PROGRESS
+    phases = {phase.phase: phase.status for phase in db.query(DBChecklistPhase).filter_by(project_id=db.project_id)}
+    assert phases == {1: checklist_store.STATUS_FAILED, 2: checklist_store.STATUS_FAILED,
+                      3: checklist_store.STATUS_FAILED}